@@ -19,7 +19,8 @@ def add_colorbar_args(parser):
     # get image infile
     
     parser.add_argument(
-        '-observation', choices=['pixel', 'V1', 'gaussian'], action='store',
+        '-observation', choices=['pixel', 'V1', 'gaussian', 'srht'],
+        action='store',
         help='[Colorbar Figure] : observation type to use when sampling',
         metavar = 'OBS', required=False, nargs=1)
     parser.add_argument(
@@ -80,7 +81,7 @@ def eval_colorbar_args(args, parser):
             
     observation : String
         Observation used to collect data for reconstruction
-        Possible observations are ['pixel', 'gaussian', 'V1']
+        Possible observations are ['pixel', 'gaussian', 'srht', 'V1']
         
     color : boolean
         Color format for how image should be reconstructed.
@@ -341,7 +342,7 @@ def parse_sweep_args():
         Name of image to reconstruct (e.g. 'tree_part1.jpg').
 
     observation : String
-        Method of observation (e.g. pixel, gaussian, v1).
+        Method of observation (e.g. pixel, gaussian, srht, v1).
     
     color : boolean
         Color format for how image should be reconstructed.
@@ -370,15 +371,38 @@ def parse_sweep_args():
         Determines filed frequency on how frequently 
         opened and closed area would appear. 
         Affect the data training.
+
+    path : boolean
+        True if every alpha should be solved in one warm-started task.
+
+    dtype : String
+        Floating point type of the reconstruction ('float64' or 'float32').
+
+    solver : String
+        Solver used by the reconstruction.
+
+    tol : float
+        Relative duality gap target of the solver.
+
+    max_iter : int
+        Maximum number of solver iterations.
+
+    weight_bank : String
+        Directory of the V1 weight bank, None to sample weights per task.
+
+    seed : int
+        Entropy of the SeedSequence of the sweep, None for fresh entropy.
     '''
 
     parser = argparse.ArgumentParser(description='Create a hyperparameter sweep')
     add_sweep_args(parser)
     args = parser.parse_args()
     method, img_name, observation, color, dwt_type, level, alpha_list, \
-        num_cells, cell_size, sparse_freq = eval_sweep_args(args, parser)
-    return method, img_name, observation, color, dwt_type, \
-        level, alpha_list, num_cells, cell_size, sparse_freq
+        num_cells, cell_size, sparse_freq, path, dtype, solver, tol, \
+        max_iter, weight_bank, seed = eval_sweep_args(args, parser)
+    return method, img_name, observation, color, dwt_type, level, \
+        alpha_list, num_cells, cell_size, sparse_freq, path, dtype, solver, \
+        tol, max_iter, weight_bank, seed
 
 def add_sweep_args(parser):
     '''
@@ -403,13 +427,14 @@ def add_sweep_args(parser):
         help='Method you would like to use for reconstruction',
         metavar='METHOD', required=True, nargs=1)
     parser.add_argument(
-        '-observation', choices=['pixel', 'V1', 'gaussian'], action='store',
+        '-observation', choices=['pixel', 'V1', 'gaussian', 'srht'],
+        action='store',
         help='observation type to use when sampling',
         metavar='OBSERVATION', required=True, nargs=1)
     parser.add_argument(
         '-color', action='store_true', 
         help='Color mode of reconstruction',
-        required=True)
+        required=False)
     # add hyperparams REQUIRED for dwt ONLY
     parser.add_argument(
         '-dwt_type', choices=wavelist, action='store', 
@@ -437,6 +462,34 @@ def add_sweep_args(parser):
         '-num_cells', action='store', 
         help='Method you would like to use for reconstruction',
         metavar='NUM_CELLS', required=True, nargs="+")
+    parser.add_argument(
+        '-path', action='store_true',
+        help='solve all alphas in one warm-started task per observation',
+        required=False)
+    parser.add_argument(
+        '-dtype', choices=['float64', 'float32'], action='store',
+        help='floating point type of the reconstruction',
+        metavar='DTYPE', required=False, default='float64')
+    parser.add_argument(
+        '-solver', choices=['lasso', 'fista', 'admm', 'omp', 'gram'],
+        action='store', help='solver used for the reconstruction',
+        metavar='SOLVER', required=False, default='lasso')
+    parser.add_argument(
+        '-tol', action='store', type=float,
+        help='duality gap over primal objective at which the solver stops',
+        metavar='TOL', required=False, default=1e-4)
+    parser.add_argument(
+        '-max_iter', action='store', type=int,
+        help='maximum number of solver iterations',
+        metavar='MAX_ITER', required=False, default=1000)
+    parser.add_argument(
+        '-weight_bank', action='store',
+        help='directory of the V1 weight bank shared by the tasks',
+        metavar='BANK_DIR', required=False, default=None)
+    parser.add_argument(
+        '-seed', action='store', type=int,
+        help='seed of the sweep, every task gets its own stream from it',
+        metavar='SEED', required=False, default=None)
 
 def eval_sweep_args(args, parser):
     '''
@@ -460,7 +513,7 @@ def eval_sweep_args(args, parser):
         Name of image to reconstruct (e.g. 'tree_part1.jpg').
 
     observation : String
-        Method of observation (e.g. pixel, gaussian, v1).
+        Method of observation (e.g. pixel, gaussian, srht, v1).
     
     color : boolean
         Color format for how image should be reconstructed.
@@ -489,6 +542,27 @@ def eval_sweep_args(args, parser):
         Determines filed frequency on how frequently 
         opened and closed area would appear. 
         Affect the data training.
+
+    path : boolean
+        True if every alpha should be solved in one warm-started task.
+
+    dtype : String
+        Floating point type of the reconstruction ('float64' or 'float32').
+
+    solver : String
+        Solver used by the reconstruction.
+
+    tol : float
+        Relative duality gap target of the solver.
+
+    max_iter : int
+        Maximum number of solver iterations.
+
+    weight_bank : String
+        Directory of the V1 weight bank, None to sample weights per task.
+
+    seed : int
+        Entropy of the SeedSequence of the sweep, None for fresh entropy.
     '''
     
     #args = parser.parse_args()
@@ -519,5 +593,243 @@ def eval_sweep_args(args, parser):
     sparse_freq = [eval(i) for i in args.sparse_freq] \
         if args.sparse_freq is not None else None
 
+    path = args.path
+    dtype = args.dtype
+    solver = args.solver
+    tol = args.tol
+    max_iter = args.max_iter
+    weight_bank = args.weight_bank
+    if weight_bank is not None and observation.lower() != "v1":
+        parser.error('-weight_bank is only used by V1 observation.')
+
     return method, img_name, observation, color, dwt_type, level, alpha_list, \
-        num_cells, cell_size, sparse_freq
\ No newline at end of file
+        num_cells, cell_size, sparse_freq, path, dtype, solver, tol, max_iter, \
+        weight_bank, args.seed
+
+def parse_benchmark_args():
+    '''
+    Parse the command line args for the benchmarks
+
+    Returns
+    ----------
+    benchmark : String
+        Name of the benchmark to run.
+
+    params : dict
+        Keyword arguments passed to the benchmark function.
+    '''
+
+    parser = argparse.ArgumentParser(description='Run a benchmark')
+    add_benchmark_args(parser)
+    args = vars(parser.parse_args())
+    benchmark = args.pop('benchmark')
+    return benchmark, args
+
+def add_benchmark_args(parser):
+    '''
+    Add a sub parser for each benchmark with its own arguments
+
+    Parameters
+    ----------
+    parser : ArgumentParser
+        parser object used to hold argument information
+    '''
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    # matrix-free fista against tiled lasso for dct
+    dct_solver = subparsers.add_parser(
+        'dct_solver', help='tiled lasso vs whole image fista for dct')
+    dct_solver.add_argument(
+        '-img_list', action='store',
+        help='filename of images to be reconstructed',
+        metavar='IMG_NAME', nargs="+",
+        default=['lena_gray_256.tif', 'lena_gray_512.tif'])
+    dct_solver.add_argument(
+        '-ratio', action='store', type=float,
+        help='fraction of pixels observed',
+        metavar='RATIO', default=0.1)
+    dct_solver.add_argument(
+        '-alpha', action='store', type=float,
+        help='alpha value to use',
+        metavar='ALPHA', default=1.0)
+    dct_solver.add_argument(
+        '-observation', choices=['pixel', 'V1', 'gaussian', 'srht'],
+        action='store',
+        help='observation type to use when sampling',
+        metavar='OBSERVATION', default='pixel')
+
+    # batched wavelet theta against the per-row wavedecn loop
+    dwt_theta = subparsers.add_parser(
+        'dwt_theta', help='batched vs looped dwt theta construction')
+    dwt_theta.add_argument(
+        '-num_cell_list', action='store', type=int,
+        help='number of rows of W',
+        metavar='NUM_CELLS', nargs="+", default=[50, 200, 500])
+    dwt_theta.add_argument(
+        '-lv_list', action='store', type=int, choices=[1, 2, 3, 4],
+        help='levels of the wavelet transform',
+        metavar='LEVEL', nargs="+", default=[1, 2, 3, 4])
+    dwt_theta.add_argument(
+        '-dwt_type', choices=pywt.wavelist(), action='store',
+        help='dwt type',
+        metavar='DWT_TYPE', default='db2')
+
+    # float32 against float64 reconstruction error
+    dtype = subparsers.add_parser(
+        'dtype', help='float32 vs float64 tiled reconstruction')
+    dtype.add_argument(
+        '-img_list', action='store',
+        help='filename of images to be reconstructed',
+        metavar='IMG_NAME', nargs="+",
+        default=['barbara.bmp', 'boat.png', 'cameraman.tif',
+                 'lena_gray_512.tif', 'livingroom.tif', 'mandril_gray.tif',
+                 'pirate.tif', 'woman_blonde.tif', 'woman_darkhair.tif'])
+    dtype.add_argument(
+        '-ratio', action='store', type=float,
+        help='fraction of pixels observed',
+        metavar='RATIO', default=0.3)
+    dtype.add_argument(
+        '-alpha', action='store', type=float,
+        help='alpha value to use',
+        metavar='ALPHA', default=1.0)
+    dtype.add_argument(
+        '-observation', choices=['pixel', 'V1', 'gaussian', 'srht'],
+        action='store',
+        help='observation type to use when sampling',
+        metavar='OBSERVATION', default='pixel')
+    dtype.add_argument(
+        '-method', choices=['dct', 'dwt'], action='store',
+        help='Method you would like to use for reconstruction',
+        metavar='METHOD', default='dct')
+
+    # warm-started regularization path against solving each alpha alone
+    path = subparsers.add_parser(
+        'path', help='regularization path vs solving each alpha alone')
+    path.add_argument(
+        '-img_list', action='store',
+        help='filename of images to be reconstructed',
+        metavar='IMG_NAME', nargs="+", default=['lena_gray_256.tif'])
+    path.add_argument(
+        '-ratio', action='store', type=float,
+        help='fraction of pixels observed',
+        metavar='RATIO', default=0.3)
+    path.add_argument(
+        '-alpha_list', action='store', type=float,
+        help='alpha values solved along the path',
+        metavar='ALPHA', nargs="+", default=[0.1, 1, 10])
+    path.add_argument(
+        '-observation', choices=['pixel', 'V1', 'gaussian', 'srht'],
+        action='store',
+        help='observation type to use when sampling',
+        metavar='OBSERVATION', default='V1')
+    path.add_argument(
+        '-solver', choices=['lasso', 'fista', 'admm', 'omp', 'gram'],
+        action='store', help='solver used for the reconstruction',
+        metavar='SOLVER', default='lasso')
+    path.add_argument(
+        '-max_iter', action='store', type=int,
+        help='maximum number of solver iterations',
+        metavar='MAX_ITER', default=1000)
+
+    # batched shift of the V1 weights against the per-weight shift_pad loop
+    shift = subparsers.add_parser(
+        'shift_pad', help='batched vs looped shift of the V1 weights')
+    shift.add_argument(
+        '-num_weights_list', action='store', type=int,
+        help='number of weights to shift',
+        metavar='NUM_WEIGHTS', nargs="+", default=[100, 1000, 10000])
+    shift.add_argument(
+        '-dim_list', action='store', type=int,
+        help='side of each square receptive field',
+        metavar='DIM', nargs="+", default=[30, 64])
+
+    # peak memory of the block-wise V1 covariance against pdist/squareform
+    cov = subparsers.add_parser(
+        'covariance', help='peak memory of the V1 covariance matrix')
+    cov.add_argument(
+        '-dim_list', action='store', type=int,
+        help='side of each square receptive field',
+        metavar='DIM', nargs="+", default=[32, 64])
+    cov.add_argument(
+        '-size', action='store', type=float,
+        help='size of the V1 receptive fields',
+        metavar='SIZE', default=2)
+    cov.add_argument(
+        '-spatial_freq', action='store', type=float,
+        help='spatial frequency of the V1 receptive fields',
+        metavar='FREQ', default=1)
+    cov.add_argument(
+        '-block_size', action='store', type=int,
+        help='rows of the covariance computed at once',
+        metavar='BLOCK', default=None)
+    cov.add_argument(
+        '-memmap', action='store_true',
+        help='also build the covariance into a temporary memmap')
+
+def parse_bank_args():
+    '''
+    Parse the command line args for the V1 weight bank
+
+    Returns
+    ----------
+    command : String
+        'build' or 'verify'.
+
+    params : dict
+        Arguments of the command.
+    '''
+
+    parser = argparse.ArgumentParser(description='Manage the V1 weight bank')
+    add_bank_args(parser)
+    args = vars(parser.parse_args())
+    command = args.pop('command')
+    return command, args
+
+def add_bank_args(parser):
+    '''
+    Add a sub parser for each weight bank command with its own arguments
+
+    Parameters
+    ----------
+    parser : ArgumentParser
+        parser object used to hold argument information
+    '''
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    # sample the pools of V1 weights into the bank
+    build = subparsers.add_parser(
+        'build', help='sample pools of V1 weights into the bank')
+    build.add_argument(
+        '-bank_dir', action='store', required=True,
+        help='directory of the weight bank', metavar='BANK_DIR')
+    build.add_argument(
+        '-dim', action='store', type=int, nargs=2,
+        help='shape of each weight', metavar='DIM', default=[30, 30])
+    build.add_argument(
+        '-cell_size', action='store', type=float, nargs="+", required=True,
+        help='cell_size of the pools', metavar='CELL_SIZE')
+    build.add_argument(
+        '-sparse_freq', action='store', type=float, nargs="+", required=True,
+        help='sparse_freq of the pools', metavar='SPARSE_FREQ')
+    build.add_argument(
+        '-seed', action='store', type=int, nargs="+", default=list(range(8)),
+        help='seeds of the pools, one per sweep repetition', metavar='SEED')
+    build.add_argument(
+        '-pool_size', action='store', type=int, default=10000,
+        help='number of weights in each pool, at least the number of'
+        ' 30x30 parts of the image times num_cell', metavar='POOL_SIZE')
+    build.add_argument(
+        '-dtype', choices=['float64', 'float32'], action='store',
+        help='floating point type of the weights',
+        metavar='DTYPE', default='float64')
+    build.add_argument(
+        '-max_bytes', action='store', type=int, default=None,
+        help='size cap of the bank, least recently used pools are evicted',
+        metavar='MAX_BYTES')
+
+    # check the pools against their metadata
+    verify = subparsers.add_parser(
+        'verify', help='check every pool of the bank against its checksum')
+    verify.add_argument(
+        '-bank_dir', action='store', required=True,
+        help='directory of the weight bank', metavar='BANK_DIR')
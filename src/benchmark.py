@@ -0,0 +1,429 @@
+import numpy as np
+import pandas as pd
+import time
+import os
+import tempfile
+import tracemalloc
+import numpy.linalg as la
+from scipy.spatial.distance import pdist, squareform
+
+from src.compress_sensing import *
+from src.utility import *
+from src.args import parse_benchmark_args
+from structured_random_features.src.models.weights import shift_pad, \
+    shift_pad_batch, V1_covariance_matrix
+
+
+def best_time(func, repeat):
+    '''
+    Run func repeat times and return the fastest wall time in seconds.
+    '''
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def benchmark_dct_solver(img_list, ratio, alpha, observation = 'pixel',
+                         filter_dim = (30, 30)):
+    '''
+    Compare the current tiled Lasso reconstruction against the matrix-free
+    fista reconstruction of the whole image in one piece.
+    Both reconstructions sample the same fraction of pixels.
+
+    Parameters
+    ----------
+    img_list : List of String
+        Name of images in the image directory (e.g. 'lena_gray_256.tif').
+
+    ratio : float
+        Fraction of the pixels observed, in between 0~1.
+
+    alpha : float
+        Penalty for fitting data onto LASSO function to
+        search for significant coefficents.
+
+    observation : String
+        Observation technique used to collect samples.
+        Default set to 'pixel'.
+
+    filter_dim : tuple
+        Size of each tile for the tiled Lasso reconstruction.
+        Default set to (30, 30).
+
+    Returns
+    ----------
+    result_df : DataFrame
+        Time and error of each reconstruction.
+    '''
+    rows = []
+    for img_name in img_list:
+        img_arr = process_image(img_name)
+        n, m = img_arr.shape
+
+        start = time.perf_counter()
+        reconst = large_img_experiment(img_arr, ratio, filter_dim = filter_dim,
+                                       alpha = alpha, observation = observation,
+                                       solver = 'lasso')
+        rows.append([img_name, f'lasso {filter_dim[0]}X{filter_dim[1]} tiles',
+                     time.perf_counter() - start,
+                     error_calculation(img_arr, reconst)])
+
+        start = time.perf_counter()
+        reconst = large_img_experiment(img_arr, ratio, filter_dim = (n, m),
+                                       alpha = alpha, observation = observation,
+                                       solver = 'fista')
+        rows.append([img_name, 'fista whole image',
+                     time.perf_counter() - start,
+                     error_calculation(img_arr, reconst)])
+
+    result_df = pd.DataFrame(rows, columns = ['img', 'solver', 'seconds',
+                                              'error'])
+    return result_df
+
+
+def benchmark_dwt_theta(num_cell_list, lv_list, dwt_type = 'db2',
+                        filter_dim = (30, 30), repeat = 5):
+    '''
+    Compare the per-row wavedecn loop that used to build the dwt theta
+    against the batched construction in dwt_theta.
+
+    Parameters
+    ----------
+    num_cell_list : List of int
+        Number of rows of W to transform.
+
+    lv_list : List of int
+        Levels of the wavelet transform.
+
+    dwt_type : String
+        Type of dwt method to be used. Default set to 'db2'.
+
+    filter_dim : tuple
+        Shape of each row of W. Default set to (30, 30).
+
+    repeat : int
+        Number of timed runs, the best one is reported. Default set to 5.
+
+    Returns
+    ----------
+    result_df : DataFrame
+        Best time of both constructions and their speedup.
+    '''
+    def loop_theta(W, lv):
+        dwt_sample = wavedecn(W[0], wavelet = dwt_type, level = lv,
+                              mode = 'zero')
+        coeff = pywt.ravel_coeffs(dwt_sample)[0]
+        theta = np.zeros((len(W), len(coeff)))
+        for i in range(len(W)):
+            theta_i = wavedecn(W[i], wavelet = dwt_type, level = lv,
+                               mode = 'zero')
+            theta[i, :] = pywt.ravel_coeffs(theta_i)[0]
+        return theta
+
+    rows = []
+    for num_cell in num_cell_list:
+        W = np.random.randn(num_cell, *filter_dim)
+        for lv in lv_list:
+            loop = best_time(lambda: loop_theta(W, lv), repeat)
+            batched = best_time(
+                lambda: dwt_theta(W, num_cell, dwt_type, lv, cache = False),
+                repeat)
+            rows.append([num_cell, lv, loop, batched, loop / batched])
+
+    result_df = pd.DataFrame(rows, columns = ['num_cell', 'lv', 'loop_seconds',
+                                              'batched_seconds', 'speedup'])
+    return result_df
+
+
+def benchmark_dtype(img_list, ratio, alpha, observation = 'pixel',
+                    method = 'dct', filter_dim = (30, 30)):
+    '''
+    Compare the tiled reconstruction kept in float32 against float64.
+    Both precisions see the same observations (same rng seed), so the
+    error difference only comes from the precision.
+
+    Parameters
+    ----------
+    img_list : List of String
+        Name of images in the image directory (e.g. 'lena_gray_512.tif').
+
+    ratio : float
+        Fraction of the pixels observed, in between 0~1.
+
+    alpha : float
+        Penalty for fitting data onto LASSO function to
+        search for significant coefficents.
+
+    observation : String
+        Observation technique used to collect samples.
+        Default set to 'pixel'.
+
+    method : String
+        Basis of the reconstruction, 'dct' or 'dwt'. Default set to 'dct'.
+
+    filter_dim : tuple
+        Size of each tile. Default set to (30, 30).
+
+    Returns
+    ----------
+    result_df : DataFrame
+        Time and error of each precision, and their error difference.
+    '''
+    rows = []
+    for img_name in img_list:
+        img_arr = process_image(img_name)
+        row = [img_name]
+        for dtype in [np.float64, np.float32]:
+            start = time.perf_counter()
+            reconst = large_img_experiment(img_arr, ratio,
+                                           filter_dim = filter_dim,
+                                           alpha = alpha, method = method,
+                                           observation = observation,
+                                           dtype = dtype,
+                                           rng = np.random.default_rng(0))
+            row += [time.perf_counter() - start,
+                    error_calculation(img_arr, reconst)]
+        rows.append(row + [row[4] - row[2]])
+
+    result_df = pd.DataFrame(rows, columns = ['img', 'float64_seconds',
+                                              'float64_error',
+                                              'float32_seconds',
+                                              'float32_error', 'error_diff'])
+    return result_df
+
+
+def benchmark_path(img_list, ratio, alpha_list, observation = 'V1',
+                   solver = 'lasso', max_iter = 1000, filter_dim = (30, 30)):
+    '''
+    Check the warm-started regularization path against solving each alpha
+    on its own. Both see the same observations (same rng seed), so once 
+    the solver converges they should give the same image for every alpha.
+
+    Parameters
+    ----------
+    img_list : List of String
+        Name of images in the image directory (e.g. 'lena_gray_256.tif').
+
+    ratio : float
+        Fraction of the pixels observed, in between 0~1.
+
+    alpha_list : List of float
+        Penalties solved along the path.
+
+    observation : String
+        Observation technique used to collect samples. V1 uses 
+        cell_size 2 and sparse_freq 5. Default set to 'V1'.
+
+    solver : String
+        Solver of the reconstruction. Default set to 'lasso'.
+
+    max_iter : int
+        Maximum number of solver iterations. Default set to 1000.
+
+    filter_dim : tuple
+        Size of each tile. Default set to (30, 30).
+
+    Returns
+    ----------
+    result_df : DataFrame
+        Error and convergence of each alpha on the path and on its own,
+        and the largest pixel difference between the two images.
+    '''
+    rows = []
+    for img_name in img_list:
+        img_arr = process_image(img_name)
+        experiment = lambda alpha: large_img_experiment(
+            img_arr, ratio, 2, 5, filter_dim = filter_dim, alpha = alpha,
+            observation = observation, solver = solver, max_iter = max_iter,
+            return_info = True, rng = np.random.default_rng(0))
+
+        start = time.perf_counter()
+        path_list, path_record = experiment(alpha_list)
+        path_seconds = time.perf_counter() - start
+        for alpha, path_img, path_info in zip(alpha_list, path_list,
+                                              path_record):
+            start = time.perf_counter()
+            single_img, single_info = experiment(alpha)
+            rows.append([img_name, alpha, path_seconds,
+                         time.perf_counter() - start,
+                         error_calculation(img_arr, path_img),
+                         error_calculation(img_arr, single_img),
+                         path_info['converged'], single_info['converged'],
+                         np.max(np.abs(path_img - single_img))])
+
+    result_df = pd.DataFrame(rows, columns = ['img', 'alpha', 'path_seconds',
+                                              'single_seconds', 'path_error',
+                                              'single_error',
+                                              'path_converged',
+                                              'single_converged', 'max_diff'])
+    return result_df
+
+
+def benchmark_shift_pad(num_weights_list, dim_list, repeat = 5):
+    '''
+    Compare the per-weight shift_pad loop that used to spread the centered
+    V1 weights over the visual field against the batched shift_pad_batch.
+
+    Parameters
+    ----------
+    num_weights_list : List of int
+        Number of weights to shift.
+
+    dim_list : List of int
+        Side of each square receptive field.
+
+    repeat : int
+        Number of timed runs, the best one is reported. Default set to 5.
+
+    Returns
+    ----------
+    result_df : DataFrame
+        Best time of both shifts and their speedup.
+    '''
+    def loop_shift(W_centered, shifts):
+        W = np.zeros_like(W_centered)
+        for i, [y_shift, x_shift] in enumerate(shifts):
+            W[i] = shift_pad(W_centered[i], y_shift, x_shift)
+        return W
+
+    rows = []
+    for dim in dim_list:
+        c = (int(dim / 2), int(dim / 2))
+        for num_weights in num_weights_list:
+            W_centered = np.random.randn(num_weights, dim, dim)
+            shifts = np.random.randint((dim, dim), size = (num_weights, 2)) - c
+            loop = best_time(lambda: loop_shift(W_centered, shifts), repeat)
+            batched = best_time(lambda: shift_pad_batch(W_centered, shifts),
+                                repeat)
+            rows.append([f'{dim}X{dim}', num_weights, loop, batched,
+                         loop / batched])
+
+    result_df = pd.DataFrame(rows, columns = ['dim', 'num_weights',
+                                              'loop_seconds', 'batched_seconds',
+                                              'speedup'])
+    return result_df
+
+def peak_memory(func):
+    '''
+    Run func once and measure the peak of the memory allocated meanwhile.
+
+    Parameters
+    ----------
+    func : function
+        Function with no arguments to measure.
+
+    Returns
+    ----------
+    peak : float
+        Peak traced memory in MB.
+
+    seconds : float
+        Run time of func.
+    '''
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        func()
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+    return peak, seconds
+
+def benchmark_covariance(dim_list, size = 2, spatial_freq = 1,
+                         block_size = None, memmap = False):
+    '''
+    Compare the peak memory of the V1 covariance matrix built at once from
+    squareform(pdist(grid)), as V1_covariance_matrix used to, against the
+    block-wise V1_covariance_matrix.
+
+    Parameters
+    ----------
+    dim_list : List of int
+        Side of each square receptive field.
+
+    size : float
+        Determines the size of the random weights. Default set to 2.
+
+    spatial_freq : float
+        Determines the spatial frequency of the random weights.
+        Default set to 1.
+
+    block_size : int
+        Number of rows computed at once, see V1_covariance_matrix.
+        Default set to None.
+
+    memmap : bool
+        Also build the block-wise matrix into a temporary .npy memmap.
+        Default set to False.
+
+    Returns
+    ----------
+    result_df : DataFrame
+        Peak memory in MB and time of every construction, and the size of
+        the matrix itself.
+    '''
+    def pdist_covariance(dim, center):
+        x = np.arange(dim[0])
+        y = np.arange(dim[1])
+        yy, xx = np.meshgrid(y, x)
+        grid = np.column_stack((xx.flatten(), yy.flatten()))
+        a = squareform(pdist(grid, 'sqeuclidean'))
+        b = la.norm(grid - center, axis = 1) ** 2
+        c = b.reshape(-1, 1)
+        C = np.exp(-a / (2 * spatial_freq ** 2)) \
+            * np.exp(-b / (2 * size ** 2)) * np.exp(-c / (2 * size ** 2)) \
+            + 1e-5 * np.eye(dim[0] * dim[1])
+        C *= dim[0] * dim[1] / np.trace(C)
+        return C
+
+    rows = []
+    for d in dim_list:
+        dim = (d, d)
+        center = (int(d / 2), int(d / 2))
+        pdist_peak, pdist_time = peak_memory(
+            lambda: pdist_covariance(dim, center))
+        block_peak, block_time = peak_memory(
+            lambda: V1_covariance_matrix(dim, size, spatial_freq, center,
+                                         block_size = block_size))
+        row = [f'{d}X{d}', (d * d) ** 2 * 8 / 1e6, pdist_peak, block_peak,
+               pdist_time, block_time]
+        if memmap:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'C.npy')
+                row += peak_memory(
+                    lambda: V1_covariance_matrix(dim, size, spatial_freq,
+                                                 center,
+                                                 block_size = block_size,
+                                                 out = path))
+        rows.append(row)
+
+    columns = ['dim', 'matrix_MB', 'pdist_peak_MB', 'block_peak_MB',
+               'pdist_seconds', 'block_seconds']
+    if memmap:
+        columns += ['memmap_peak_MB', 'memmap_seconds']
+    result_df = pd.DataFrame(rows, columns = columns)
+    return result_df
+
+
+def main():
+    benchmark, params = parse_benchmark_args()
+    if benchmark == 'dct_solver':
+        result_df = benchmark_dct_solver(**params)
+    elif benchmark == 'dwt_theta':
+        result_df = benchmark_dwt_theta(**params)
+    elif benchmark == 'dtype':
+        result_df = benchmark_dtype(**params)
+    elif benchmark == 'path':
+        result_df = benchmark_path(**params)
+    elif benchmark == 'shift_pad':
+        result_df = benchmark_shift_pad(**params)
+    elif benchmark == 'covariance':
+        result_df = benchmark_covariance(**params)
+    print(result_df.to_string(index = False))
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,26 @@
 import numpy as np
 import sys
 import os
-from structured_random_features.src.models.weights import V1_weights
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, \
+    as_completed, wait, FIRST_COMPLETED
+from threadpoolctl import threadpool_limits
+from numpy.lib.format import open_memmap
+from structured_random_features.src.models.weights import V1_weights, \
+    check_rng
+from src.weight_bank import bank_weights
 
 # Packages for dct, dwt and fitting data
 from scipy import fftpack as fft
+from scipy.linalg import cho_factor, cho_solve
+from scipy.sparse.linalg import LinearOperator, aslinearoperator, svds
 import pywt
 from pywt import wavedecn
-from sklearn.linear_model import Lasso
+from sklearn.linear_model import Lasso, orthogonal_mp, orthogonal_mp_gram
 
 import warnings
 from sklearn.exceptions import ConvergenceWarning
@@ -27,7 +40,7 @@ def generate_Y(W, img_arr):
     
     Parameters
     ----------
-    W : array_like
+    W : array_like or PixelObservation
         (num_V1_weights/sample_size, n*m) shape array. Lists of weighted data
         
     img : array_like
@@ -42,11 +55,68 @@ def generate_Y(W, img_arr):
     
     num_cell = W.shape[0]
     n, m = img_arr.shape[:2]
+    if isinstance(W, (PixelObservation, SRHTObservation)):
+        return W.apply(img_arr.reshape(n * m, 1))
     W = W.reshape(num_cell, n*m)
     y = W @ img_arr.reshape(n * m, 1)
     return y
 
-def generate_V1_observation(img_arr, num_cell, cell_size, sparse_freq):
+def stream_observation(sample, img_arr, num_cell, chunk_size,
+                       dtype = np.float64, W_path = None):
+    ''' 
+    Generate W in chunks of rows and accumulate y = W @ img chunk by chunk.
+    Only one chunk of W is held in memory at a time when W is written to a
+    .npy memmap, which the solver can read back without loading it.
+    
+    Parameters
+    ----------
+    sample : function
+        sample(num) returns the next num rows of W, (num, n*m) shape.
+
+    img_arr : array_like
+        (n, m) shape image containing array of pixels
+          
+    num_cell : int
+        Number of rows of W.
+
+    chunk_size : int
+        Number of rows generated at once.
+
+    dtype : data-type
+        Floating point type of W and y. Default set to np.float64.
+
+    W_path : String
+        Path of the .npy memmap W is written to. Default set to None, W is
+        kept in memory.
+    
+    Returns
+    ----------
+    W : array_like or numpy memmap
+        (num_cell, n, m) shape array.
+    
+    y : vector
+        (num_cell, 1) shape. Dot product of W and image
+    '''
+    n, m = np.asanyarray(img_arr).shape[:2]
+    img = np.asarray(img_arr, dtype = dtype).reshape(n * m, 1)
+    if W_path is not None:
+        W = open_memmap(W_path, mode = 'w+', dtype = dtype,
+                        shape = (num_cell, n, m))
+    else:
+        W = np.empty((num_cell, n, m), dtype = dtype)
+    y = np.empty((num_cell, 1), dtype = dtype)
+    for start in range(0, num_cell, chunk_size):
+        num = min(chunk_size, num_cell - start)
+        W_chunk = np.asarray(sample(num), dtype = dtype).reshape(num, n * m)
+        y[start : start + num] = W_chunk @ img
+        W[start : start + num] = W_chunk.reshape(num, n, m)
+    if W_path is not None:
+        W.flush()
+    return W, y
+
+def generate_V1_observation(img_arr, num_cell, cell_size, sparse_freq,
+                            dtype = np.float64, rng = None, chunk_size = None,
+                            W_path = None):
     ''' 
     Automatically generates variables needed for 
     data reconstruction using V1 weights.
@@ -68,6 +138,22 @@ def generate_V1_observation(img_arr, num_cell, cell_size, sparse_freq):
         Determines filed frequency on how frequently 
         opened and closed area would appear. 
         Affect the data training.
+
+    dtype : data-type
+        Floating point type of W and y. Default set to np.float64.
+
+    rng : np.random.Generator
+        Generator to draw from, see check_rng. Default set to None, drawn
+        from the global numpy random state.
+
+    chunk_size : int
+        Generate W in chunks of chunk_size rows and accumulate y chunk by 
+        chunk, see stream_observation. Default set to None, all at once.
+
+    W_path : String
+        With chunk_size, write W into a .npy memmap at this path, so that 
+        peak memory only depends on chunk_size. Default set to None, W is
+        kept in memory.
     
     Returns
     ----------
@@ -81,19 +167,103 @@ def generate_V1_observation(img_arr, num_cell, cell_size, sparse_freq):
     # Get size of image
     dim = np.asanyarray(img_arr).shape[:2]
     n, m = dim
+    if chunk_size is not None:
+        rng = check_rng(rng)
+        sample = lambda num: V1_weights(num, dim, cell_size, sparse_freq,
+                                        rng = rng)
+        return stream_observation(sample, img_arr, num_cell, chunk_size,
+                                  dtype, W_path)
+
     # Store generated V1 cells in W
-    W = V1_weights(num_cell, dim, cell_size, sparse_freq) 
+    W = V1_weights(num_cell, dim, cell_size, sparse_freq,
+                   rng = rng).astype(dtype, copy = False)
     
     # Retrieve y from W @ imgArr
-    y = W @ img_arr.reshape(n*m, 1)
+    y = W @ np.asarray(img_arr, dtype = dtype).reshape(n*m, 1)
 
     # Resize W to shape (num_cell, height of image, width of image) for 
     # fetching into function
     W = W.reshape(num_cell, n, m)
     return W, y
 
+# Compact pixel observation
+class PixelObservation:
+    ''' 
+    Pixel observation stored as its sampled pixel indices and scale factor.
+    It stands for the (num_cell, n, m) stack W where row i is zero except for
+    scale at pixel index[i], without allocating it. Use toarray() (or 
+    np.asarray) to get the dense W.
+    
+    Parameters
+    ----------
+    index : array_like
+        (num_cell, ) shape. Flat index of each sampled pixel in (n, m).
+    
+    dim : tuple
+        (n, m) shape of the observed image.
+    
+    scale : float
+        Value of each open pixel, sqrt(n * m) for generate_pixel_observation.
+
+    dtype : data-type
+        Floating point type of W. Default set to np.float64.
+    '''
+
+    ndim = 3
+
+    def __init__(self, index, dim, scale, dtype = np.float64):
+        self.index = np.asarray(index)
+        self.dim = tuple(dim)
+        self.dtype = np.dtype(dtype)
+        self.scale = self.dtype.type(scale)
+        self.shape = (len(self.index),) + self.dim
+
+    def __len__(self):
+        return self.shape[0]
+
+    def toarray(self):
+        ''' 
+        Dense (num_cell, n, m) W.
+        '''
+        num_cell = self.shape[0]
+        W = np.zeros((num_cell, self.dim[0] * self.dim[1]), dtype = self.dtype)
+        W[np.arange(num_cell), self.index] = self.scale
+        return W.reshape(self.shape)
+
+    def __array__(self, dtype = None, copy = None):
+        W = self.toarray()
+        return W if dtype is None else W.astype(dtype)
+
+    def reshape(self, *shape):
+        return self.toarray().reshape(*shape)
+
+    def astype(self, dtype, copy = True):
+        ''' 
+        Same observation with W of type dtype.
+        '''
+        if not copy and self.dtype == np.dtype(dtype):
+            return self
+        return PixelObservation(self.index, self.dim, self.scale, dtype)
+
+    def apply(self, img):
+        ''' 
+        W @ img for images of shape (n*m, k), by gathering the indices.
+        '''
+        return self.scale * img[self.index]
+
+    def apply_adjoint(self, r):
+        ''' 
+        W^T @ r for r of shape (num_cell, k), by scattering into the indices.
+        Repeated indices are accumulated.
+        '''
+        img = np.zeros((self.dim[0] * self.dim[1],) + r.shape[1:],
+                       dtype = np.result_type(r, self.dtype))
+        np.add.at(img, self.index, self.scale * r)
+        return img
+
 # Generate pixel Variables
-def generate_pixel_observation(img_arr, num_cell) :
+def generate_pixel_observation(img_arr, num_cell, dtype = np.float64,
+                               rng = None) :
     ''' 
     Generate random pixel arrays with its indices length of sample size.
         
@@ -104,28 +274,35 @@ def generate_pixel_observation(img_arr, num_cell) :
     
     num_cell : int
         Number of sample data to be collected
+
+    dtype : data-type
+        Floating point type of W and y. Default set to np.float64.
+
+    rng : np.random.Generator
+        Generator to draw from, see check_rng. Default set to None, drawn
+        from the global numpy random state.
     
     Returns
     ----------
-    C3D : array like
-        (sample_size, n, m) shape array that only has one index open 
+    W : PixelObservation
+        (sample_size, n, m) shape observation that only has one index open 
         that corresponds to y vector per each (n, m) shape array.
+        Only the indices are stored, use W.toarray() for the dense array.
     
     y : vector
         Actual value of randomly selected indices
     '''
     
     n, m = img_arr.shape[:2]
-    rand_index = np.random.randint(0, n * m, num_cell)
-    y = img_arr.flatten()[rand_index].reshape(num_cell, 1)
-    
-    y = y * np.sqrt(n * m)
-    W = np.eye(n * m)[rand_index, :] * np.sqrt(n * m)
-    W = W.reshape(num_cell, n, m)
+    rand_index = check_rng(rng).integers(0, n * m, num_cell)
+    W = PixelObservation(rand_index, (n, m), np.sqrt(n * m), dtype)
+    y = generate_Y(W, np.asarray(img_arr, dtype = dtype))
     return W, y
 
 # Generate Gaussian Weights
-def generate_gaussian_observation(img_arr, num_cell):
+def generate_gaussian_observation(img_arr, num_cell, dtype = np.float64,
+                                  rng = None, chunk_size = None,
+                                  W_path = None):
     ''' 
     Generate 3 dimensional arrays. 
     Creates arrays of randomly generated gaussian 
@@ -139,6 +316,22 @@ def generate_gaussian_observation(img_arr, num_cell):
     num_cell : int
         Number of blobs that will be used to be 
         determining which pixels to grab and use.
+
+    dtype : data-type
+        Floating point type of W and y. Default set to np.float64.
+
+    rng : np.random.Generator
+        Generator to draw from, see check_rng. Default set to None, drawn
+        from the global numpy random state.
+
+    chunk_size : int
+        Generate W in chunks of chunk_size rows and accumulate y chunk by 
+        chunk, see stream_observation. Default set to None, all at once.
+
+    W_path : String
+        With chunk_size, write W into a .npy memmap at this path, so that 
+        peak memory only depends on chunk_size. Default set to None, W is
+        kept in memory.
         
     Returns
     ----------
@@ -149,8 +342,145 @@ def generate_gaussian_observation(img_arr, num_cell):
         (num_V1_weights/sample_size, 1) shape. Dot product of W and image.
     '''
     n, m = img_arr.shape[:2]
-    W = np.random.randn(num_cell, n, m)
-    y = generate_Y(W, img_arr)
+    rng = check_rng(rng)
+    if chunk_size is not None:
+        sample = lambda num: rng.standard_normal((num, n * m), dtype = dtype)
+        return stream_observation(sample, img_arr, num_cell, chunk_size,
+                                  dtype, W_path)
+    W = rng.standard_normal((num_cell, n, m), dtype = dtype)
+    y = generate_Y(W, np.asarray(img_arr, dtype = dtype))
+    return W, y
+
+# Structured random observation, applied with a fast transform
+class SRHTObservation:
+    ''' 
+    Subsampled randomized orthogonal transform observation,
+    W = scale * S @ T @ D, where D flips the sign of each pixel at random,
+    T is the orthonormal 2D dct and S keeps num_cell of its rows.
+    W and W^T are applied in O(n*m*log(n*m)) through the dct, and only the
+    signs and the row indices are stored, instead of the num_cell * n * m
+    entries of a dense gaussian W. The dct stands in for the Hadamard
+    transform of a SRHT, so any (n, m) works, not only powers of 2.
+    
+    Parameters
+    ----------
+    signs : array_like
+        (n*m, ) shape array of +1 / -1 sign flip of each pixel.
+
+    index : array_like
+        (num_cell, ) shape array of the kept rows of the transform.
+    
+    dim : tuple
+        (n, m) shape of the observed image.
+    
+    scale : float
+        Scale of W, sqrt(n * m) for generate_srht_observation so that its
+        rows have the same norm as gaussian rows.
+
+    dtype : data-type
+        Floating point type of W. Default set to np.float64.
+    '''
+
+    ndim = 3
+
+    def __init__(self, signs, index, dim, scale, dtype = np.float64):
+        self.dtype = np.dtype(dtype)
+        self.signs = np.asarray(signs, dtype = self.dtype)
+        self.index = np.asarray(index)
+        self.dim = tuple(dim)
+        self.scale = self.dtype.type(scale)
+        self.shape = (len(self.index),) + self.dim
+
+    def __len__(self):
+        return self.shape[0]
+
+    def toarray(self):
+        ''' 
+        Dense (num_cell, n, m) W. Row k is the sign flipped dct basis image
+        of the kept row index[k].
+        '''
+        num_cell = self.shape[0]
+        basis = np.zeros((num_cell, self.dim[0] * self.dim[1]),
+                         dtype = self.dtype)
+        basis[np.arange(num_cell), self.index] = self.scale
+        W = fft.idctn(basis.reshape(self.shape), norm = 'ortho', axes = [1, 2])
+        return W * self.signs.reshape(self.dim)
+
+    def __array__(self, dtype = None, copy = None):
+        W = self.toarray()
+        return W if dtype is None else W.astype(dtype)
+
+    def reshape(self, *shape):
+        return self.toarray().reshape(*shape)
+
+    def astype(self, dtype, copy = True):
+        ''' 
+        Same observation with W of type dtype.
+        '''
+        if not copy and self.dtype == np.dtype(dtype):
+            return self
+        return SRHTObservation(self.signs, self.index, self.dim, self.scale,
+                               dtype)
+
+    def apply(self, img):
+        ''' 
+        W @ img for images of shape (n*m, k): flip signs, dct, keep rows.
+        '''
+        n, m = self.dim
+        img = (self.signs[:, None] * img).reshape(n, m, -1)
+        coef = fft.dctn(img, norm = 'ortho', axes = [0, 1])
+        return self.scale * coef.reshape(n * m, -1)[self.index]
+
+    def apply_adjoint(self, r):
+        ''' 
+        W^T @ r for r of shape (num_cell, k): scatter into the kept rows,
+        inverse dct, flip signs. Repeated indices are accumulated.
+        '''
+        n, m = self.dim
+        coef = np.zeros((n * m,) + r.shape[1:],
+                        dtype = np.result_type(r, self.dtype))
+        np.add.at(coef, self.index, self.scale * r)
+        img = fft.idctn(coef.reshape(n, m, -1), norm = 'ortho', axes = [0, 1])
+        return self.signs[:, None] * img.reshape(n * m, -1)
+
+def generate_srht_observation(img_arr, num_cell, dtype = np.float64,
+                              rng = None):
+    ''' 
+    Generate a structured random observation (see SRHTObservation) with 
+    random sign flips and num_cell rows of the dct kept without repetition.
+    It is the classical random baseline that scales to full images: 
+    creating it is O(n*m) and applying it O(n*m*log(n*m)).
+    
+    Parameters
+    ----------
+    img_arr : array_like
+        (n, m) sized data array.
+        
+    num_cell : int
+        Number of rows of the transform to keep, at most n * m.
+
+    dtype : data-type
+        Floating point type of W and y. Default set to np.float64.
+
+    rng : np.random.Generator
+        Generator to draw from, see check_rng. Default set to None, drawn
+        from the global numpy random state.
+        
+    Returns
+    ----------
+    W : SRHTObservation
+        (num_cell, n, m) shape observation, use W.toarray() for the dense 
+        array.
+    
+    y : vector
+        (num_cell, 1) shape. Dot product of W and image.
+    '''
+    n, m = img_arr.shape[:2]
+    rng = check_rng(rng)
+    signs = rng.choice([-1, 1], size = n * m)
+    index = rng.choice(n * m, size = num_cell, replace = False)
+    W = SRHTObservation(signs, index, (n, m), np.sqrt(n * m), dtype)
+    y = generate_Y(W, np.asarray(img_arr, dtype = dtype))
     return W, y
 
 # Error Calculation by Frobenius Norm
@@ -176,17 +506,1059 @@ def error_calculation(img_arr, reconst):
     else: 
         n, m = img_arr.shape
 
-    error = np.linalg.norm(img_arr - reconst) / np.sqrt(m * n)
-    return error
+    error = np.linalg.norm(img_arr - reconst) / np.sqrt(m * n)
+    return error
+
+# Matrix-free sensing operator and proximal solver
+def dct_operator(W, n, m):
+    '''
+    Build the sensing operator W @ IDCT as a matrix-free linear operator.
+    Applying the operator to the dct coefficients s gives W @ idct(s),
+    which is exactly theta @ s without ever forming theta.
+
+    Parameters
+    ----------
+    W : array_like, PixelObservation or SRHTObservation
+        (num_V1_weights, n, m) shape array. Lists of weighted data.
+        A PixelObservation is applied by indexing and a SRHTObservation 
+        through the dct, without a dense W.
+
+    n : int
+        Height of each data.
+
+    m : int
+        Width of each data.
+
+    Returns
+    ----------
+    A : LinearOperator
+        (num_V1_weights, n*m) shape operator.
+        Forward applies IDCT then W, adjoint applies W^T then DCT.
+    '''
+
+    num_cell = W.shape[0]
+    if isinstance(W, (PixelObservation, SRHTObservation)):
+        apply, apply_adjoint = W.apply, W.apply_adjoint
+    else:
+        W_flat = W.reshape(num_cell, n * m)
+        apply = lambda img: W_flat @ img
+        apply_adjoint = lambda r: W_flat.T @ r
+
+    def matmat(s):
+        img = fft.idctn(s.reshape(n, m, -1), norm = 'ortho', axes = [0, 1])
+        return apply(img.reshape(n * m, -1))
+
+    def rmatmat(r):
+        img = apply_adjoint(r.reshape(num_cell, -1)).reshape(n, m, -1)
+        s = fft.dctn(img, norm = 'ortho', axes = [0, 1])
+        return s.reshape(n * m, -1)
+
+    A = LinearOperator((num_cell, n * m),
+                       matvec = lambda s: matmat(s).ravel(),
+                       rmatvec = lambda r: rmatmat(r).ravel(),
+                       matmat = matmat, rmatmat = rmatmat,
+                       dtype = W.dtype)
+    return A
+
+def dct_col_norm(W, n, m, chunk_size = 256):
+    '''
+    Norm of every column of theta = W @ IDCT (see dct_theta) without
+    forming theta, for gap safe screening with dct_operator. For a
+    PixelObservation it is one small matrix product, else theta is built
+    chunk_size rows at a time.
+
+    Parameters
+    ----------
+    W : array_like, PixelObservation or SRHTObservation
+        (num_V1_weights, n, m) shape array. Lists of weighted data.
+
+    n : int
+        Height of each data.
+
+    m : int
+        Width of each data.
+
+    chunk_size : int
+        Rows of theta built at once. Default set to 256.
+
+    Returns
+    ----------
+    col_norm : array_like
+        (n*m, ) shape norm of every column of theta.
+    '''
+    if isinstance(W, PixelObservation):
+        # theta[k, p, q] = scale * dct_n[p, row_k] * dct_m[q, col_k]
+        row, col = np.unravel_index(W.index, (n, m))
+        dct_n = fft.dct(np.eye(n, dtype = W.dtype), norm = 'ortho', axis = 0)
+        dct_m = fft.dct(np.eye(m, dtype = W.dtype), norm = 'ortho', axis = 0)
+        norm2 = W.scale ** 2 * (dct_n[:, row] ** 2) @ (dct_m[:, col] ** 2).T
+        return np.sqrt(norm2).ravel()
+
+    norm2 = np.zeros(n * m, dtype = W.dtype)
+    for start in range(0, W.shape[0], chunk_size):
+        if isinstance(W, SRHTObservation):
+            rows = SRHTObservation(W.signs, W.index[start : start + chunk_size],
+                                   W.dim, W.scale, W.dtype).toarray()
+        else:
+            rows = W[start : start + chunk_size]
+        theta = fft.dctn(rows.reshape(-1, n, m), norm = 'ortho', axes = [1, 2])
+        norm2 += np.sum(theta.reshape(len(theta), -1) ** 2, axis = 0)
+    return np.sqrt(norm2)
+
+def soft_threshold(s, threshold):
+    '''
+    Proximal operator of the L1 norm.
+
+    Parameters
+    ----------
+    s : array_like
+        Coefficients to be shrunk.
+
+    threshold : float
+        Amount each coefficient is shrunk towards zero.
+
+    Returns
+    ----------
+    s_shrunk : array_like
+        Same shape as s, with every entry shrunk by threshold.
+    '''
+    return np.sign(s) * np.maximum(np.abs(s) - threshold, 0)
+
+def lipschitz_constant(A):
+    '''
+    Lipschitz constant of the gradient of (1 / (2 * num_cell)) ||y - A @ s||^2,
+    with a small safety margin for the iterative estimate of ||A||.
+
+    Parameters
+    ----------
+    A : LinearOperator or array_like
+        (num_cell, num_coef) shape operator or matrix.
+
+    Returns
+    ----------
+    L : float
+        Largest singular value of A squared, over num_cell.
+    '''
+    A = aslinearoperator(A)
+    # fixed start vector, so repeated solves of the same A are reproducible
+    v0 = np.ones(min(A.shape), dtype = A.dtype)
+    sigma = svds(A, k = 1, tol = 1e-4, v0 = v0,
+                 return_singular_vectors = False)[0]
+    return float(1.01 * sigma ** 2 / A.shape[0])
+
+def lasso_dual_gap(A, y, s, alpha):
+    '''
+    Duality gap of the LASSO objective used by sklearn Lasso,
+    (1 / (2 * num_cell)) * ||y - A @ s||^2 + alpha * ||s||_1,
+    at the coefficients s. The dual point is the rescaled residual.
+    Each column of y is treated as its own problem.
+
+    Parameters
+    ----------
+    A : LinearOperator
+        (num_cell, num_coef) shape operator.
+
+    y : array_like
+        (num_cell, k) shape. Observed samples, one column per problem.
+
+    s : array_like
+        (num_coef, k) shape. Current coefficients.
+
+    alpha : float
+        Penalty for the L1 norm of the coefficients.
+
+    Returns
+    ----------
+    gap : array_like
+        (k, ) shape. Primal objective minus dual objective, always >= 0.
+    '''
+    return _lasso_dual(A, y, s, alpha)[0]
+
+def lasso_relative_gap(A, y, s, alpha):
+    '''
+    Duality gap relative to the primal objective at s, see lasso_dual_gap.
+    Unlike sklearn's tol * ||y||^2 / num_cell, it does not depend on the
+    scale of y, so a target of tol bounds the objective to within a factor
+    (1 + tol) of the optimum whatever the pixel range.
+
+    Parameters
+    ----------
+    A, y, s, alpha
+        See lasso_dual_gap.
+
+    Returns
+    ----------
+    gap : array_like
+        (k, ) shape. Duality gap over primal objective, always >= 0.
+    '''
+    gap, _, _, primal = _lasso_dual(A, y, s, alpha)
+    return gap / np.maximum(primal, 1e-300)
+
+def _lasso_dual(A, y, s, alpha):
+    '''
+    Duality gap, dual scaling const, correlations A^T @ (y - A @ s) and
+    primal objective, see lasso_dual_gap. The dual point is 
+    const * (y - A @ s) / (num_cell * alpha).
+    '''
+    num_cell = A.shape[0]
+    r = y - A.matmat(s)
+    corr = A.rmatmat(r)
+    dual_norm = np.max(np.abs(corr), axis = 0)
+    const = np.minimum(1, num_cell * alpha / np.maximum(dual_norm, 1e-300))
+    r_norm2 = np.sum(r ** 2, axis = 0)
+    l1 = alpha * np.abs(s).sum(axis = 0)
+    gap = (0.5 * (1 + const ** 2) * r_norm2 - const * np.sum(r * y, axis = 0)) \
+        / num_cell + l1
+    primal = 0.5 * r_norm2 / num_cell + l1
+    return np.maximum(gap, 0), const, corr, primal
+
+def gap_safe_screen(theta, y, s, alpha, col_norm = None):
+    '''
+    Gap safe screening rule for the LASSO objective used by sklearn Lasso.
+    The optimal dual point lies in a sphere around the current dual point
+    whose radius comes from the duality gap, and column j of theta can only
+    be nonzero at the optimum if |theta_j^T @ dual point| can reach 1 inside
+    that sphere. Every other column is provably zero and can be dropped.
+    With several columns of y, a coefficient is only dropped if it is
+    inactive for every one of them.
+
+    Parameters
+    ----------
+    theta : array_like or LinearOperator
+        (num_cell, num_coef) shape matrix or operator.
+
+    y : array_like
+        (num_cell, k) shape. Observed samples.
+
+    s : array_like
+        (num_coef, k) shape. Current coefficients.
+
+    alpha : float
+        Penalty for the L1 norm of the coefficients.
+
+    col_norm : array_like
+        (num_coef, ) shape norm of every column of theta, needed when
+        theta is an operator (e.g. dct_col_norm).
+        Default set to None, which computes it from the matrix.
+
+    Returns
+    ----------
+    active : array_like
+        (num_coef, ) shape bool, False for coefficients that are zero at
+        the optimum.
+
+    gap : array_like
+        (k, ) shape duality gap at s.
+    '''
+    if col_norm is None:
+        col_norm = np.linalg.norm(theta, axis = 0)
+    gap, const, corr, _ = _lasso_dual(aslinearoperator(theta), y, s, alpha)
+    active = _gap_safe_active(theta.shape[0], alpha, gap, const, corr,
+                              col_norm)
+    return active, gap
+
+def _gap_safe_active(num_cell, alpha, gap, const, corr, col_norm):
+    '''
+    Gap safe rule of gap_safe_screen from the outputs of _lasso_dual.
+    '''
+    # objective and dual rescaled by num_cell, so the penalty is num_cell*alpha
+    lam = num_cell * alpha
+    radius = np.sqrt(2 * num_cell * gap) / lam
+    score = const * np.abs(corr) / lam + radius * col_norm[:, None]
+    return np.any(score >= 1, axis = 1)
+
+def _expand(v, index, num_coef):
+    '''
+    (num_coef, k) shape v scattered to the rows index, zero elsewhere.
+    '''
+    if len(index) == num_coef:
+        return v
+    out = np.zeros((num_coef,) + v.shape[1:], dtype = v.dtype)
+    out[index] = v
+    return out
+
+def _column_subset(A, theta, index):
+    '''
+    Operator of the columns index of A, sliced from theta when it is dense.
+    '''
+    if theta is not None:
+        return aslinearoperator(theta[:, index])
+    num_coef = A.shape[1]
+    return LinearOperator(
+        (A.shape[0], len(index)), dtype = A.dtype,
+        matvec = lambda v: A.matvec(_expand(v, index, num_coef)),
+        rmatvec = lambda r: A.rmatvec(r)[index],
+        matmat = lambda V: A.matmat(_expand(V, index, num_coef)),
+        rmatmat = lambda R: A.rmatmat(R)[index])
+
+def fista(A, y, alpha, tol = 1e-4, max_iter = 1000, s0 = None, L = None,
+          return_n_iter = False, active = None, col_norm = None):
+    '''
+    Solve the LASSO problem with accelerated proximal gradient (FISTA).
+    Minimizes the same objective as sklearn Lasso,
+    (1 / (2 * num_cell)) * ||y - A @ s||^2 + alpha * ||s||_1,
+    but only needs A through its forward and adjoint products.
+    Several right-hand sides (columns of y) are solved together, sharing
+    every product with A.
+
+    Parameters
+    ----------
+    A : LinearOperator or array_like
+        (num_cell, num_coef) shape operator or matrix.
+
+    y : array_like
+        (num_cell, 1) or (num_cell, k) shape. Observed samples.
+
+    alpha : float
+        Penalty for the L1 norm of the coefficients.
+
+    tol : float
+        Stop once the duality gap of every column is below tol times its
+        primal objective (see lasso_relative_gap).
+        Checked every 10 iterations.
+        Default set to 1e-4.
+
+    max_iter : int
+        Maximum number of iterations.
+        Default set to 1000.
+
+    s0 : array_like
+        Initial coefficients. Default set to None, which starts from zero.
+
+    L : float
+        Lipschitz constant from lipschitz_constant(A). Pass it when solving
+        the same A repeatedly. Default set to None, which computes it.
+
+    return_n_iter : bool
+        Also return the number of iterations run. Default set to False.
+
+    active : array_like
+        (num_coef, ) shape bool, updated in place. If given, the gap safe
+        rule (see gap_safe_screen) is applied at every duality gap check,
+        and coefficients it proves zero are set to False and dropped from
+        the iterates, keeping the momentum. 
+        Default set to None, no screening.
+
+    col_norm : array_like
+        (num_coef, ) shape norm of every column of A, needed with active.
+
+    Returns
+    ----------
+    s : array_like
+        (num_coef, ) shape sparse coefficients if y has one column,
+        else (num_coef, k) shape.
+
+    n_iter : int
+        Only returned if return_n_iter is True. Iterations run, max_iter if
+        the tolerance was not reached.
+    '''
+
+    theta = A if isinstance(A, np.ndarray) else None
+    A = aslinearoperator(A)
+    num_cell, num_coef = A.shape
+    y = np.asarray(y).reshape(num_cell, -1)
+    k = y.shape[1]
+
+    if L is None:
+        L = lipschitz_constant(A)
+
+    s = np.zeros((num_coef, k), dtype = y.dtype) if s0 is None \
+        else np.asarray(s0, dtype = y.dtype).reshape(num_coef, k).copy()
+    z = s.copy()
+    t = 1
+    # s, z only hold the coefficients index left by screening, A_act the
+    # matching columns of A
+    index = np.arange(num_coef)
+    A_act = A
+    n_iter = max_iter
+    for it in range(max_iter):
+        if it % 10 == 0:
+            gap, const, corr, primal = _lasso_dual(
+                A, y, _expand(s, index, num_coef), alpha)
+            if np.all(gap <= tol * primal):
+                n_iter = it
+                break
+            if active is not None:
+                active &= _gap_safe_active(num_cell, alpha, gap, const, corr,
+                                           col_norm)
+                keep = active[index]
+                if not keep.all():
+                    index, s, z = index[keep], s[keep], z[keep]
+                    A_act = _column_subset(A, theta, index)
+        grad = A_act.rmatmat(A_act.matmat(z) - y) / num_cell
+        s_nxt = soft_threshold(z - grad / L, alpha / L)
+        t_nxt = (1 + (1 + 4 * t ** 2) ** 0.5) / 2
+        z = s_nxt + ((t - 1) / t_nxt) * (s_nxt - s)
+        s, t = s_nxt, t_nxt
+    s = _expand(s, index, num_coef)
+    s = s.ravel() if k == 1 else s
+    return (s, n_iter) if return_n_iter else s
+
+def admm(theta, y, alpha, tol = 1e-4, max_iter = 1000, s0 = None,
+         kernel = None, rho = None, return_n_iter = False, active = None,
+         col_norm = None):
+    '''
+    Solve the LASSO problem with ADMM in its dual (kernel) form.
+    Minimizes the same objective as sklearn Lasso,
+    (1 / (2 * num_cell)) * ||y - theta @ s||^2 + alpha * ||s||_1.
+    The least squares step is solved with the Woodbury identity, so only the
+    (num_cell, num_cell) kernel matrix theta @ theta^T is factorized. This is
+    much smaller than the Gram matrix theta^T @ theta when the problem is
+    heavily undersampled (num_cell << num_coef).
+    Several right-hand sides (columns of y) are solved together.
+
+    Parameters
+    ----------
+    theta : array_like
+        (num_cell, num_coef) shape matrix.
+
+    y : array_like
+        (num_cell, 1) or (num_cell, k) shape. Observed samples.
+
+    alpha : float
+        Penalty for the L1 norm of the coefficients.
+
+    tol : float
+        Stop once the duality gap of every column is below tol times its
+        primal objective (see lasso_relative_gap), and both ADMM residuals
+        are below sqrt(tol) relative to the iterates.
+        Checked every 10 iterations.
+        Default set to 1e-4.
+
+    max_iter : int
+        Maximum number of iterations.
+        Default set to 1000.
+
+    s0 : array_like
+        Initial coefficients. Default set to None, which starts from zero.
+
+    kernel : array_like
+        (num_cell, num_cell) shape theta @ theta^T. Pass it when solving
+        the same theta repeatedly. Default set to None, which computes it.
+
+    rho : float
+        Initial ADMM penalty. It is rebalanced every 10 iterations so the 
+        primal and dual residuals stay within a factor 10 of each other.
+        Default set to None, which starts from alpha.
+
+    return_n_iter : bool
+        Also return the number of iterations run. Default set to False.
+
+    active : array_like
+        (num_coef, ) shape bool, updated in place. If given, the gap safe
+        rule (see gap_safe_screen) is applied every 10 iterations, and
+        coefficients it proves zero are set to False and held at zero.
+        Once a tenth of the columns are screened they are dropped and the
+        kernel is refactorized on the rest.
+        Default set to None, no screening.
+
+    col_norm : array_like
+        (num_coef, ) shape norm of every column of theta, needed with active.
+
+    Returns
+    ----------
+    s : array_like
+        (num_coef, ) shape sparse coefficients if y has one column,
+        else (num_coef, k) shape.
+
+    n_iter : int
+        Only returned if return_n_iter is True. Iterations run, max_iter if
+        the tolerance was not reached.
+    '''
+
+    num_cell, num_coef = theta.shape
+    y = np.asarray(y).reshape(num_cell, -1)
+    k = y.shape[1]
+    A = aslinearoperator(theta)
+
+    if kernel is None:
+        kernel = theta @ theta.T
+    if rho is None:
+        rho = alpha
+    eye = np.eye(num_cell, dtype = kernel.dtype)
+    factor = cho_factor(kernel + num_cell * rho * eye)
+
+    res_tol = np.sqrt(tol)
+    theta_y = theta.T @ y / num_cell
+    z = np.zeros((num_coef, k), dtype = y.dtype) if s0 is None \
+        else np.asarray(s0, dtype = y.dtype).reshape(num_coef, k).copy()
+    u = np.zeros_like(z)
+    # z, u, theta_y and theta only hold the coefficients index left by
+    # screening, screened ones still in index are held at zero by drop
+    index = np.arange(num_coef)
+    drop = np.zeros(num_coef, dtype = bool)
+    n_iter = max_iter
+    for it in range(max_iter):
+        # (theta^T theta / num_cell + rho I)^-1 q through the Woodbury identity
+        q = theta_y + rho * (z - u)
+        x = (q - theta.T @ cho_solve(factor, theta @ q)) / rho
+        z_prev = z
+        z = soft_threshold(x + u, alpha / rho)
+        z[drop] = 0
+        u += x - z
+        if it % 10 != 0:
+            continue
+
+        r = np.linalg.norm(x - z)
+        d = rho * np.linalg.norm(z - z_prev)
+        converged = (r <= res_tol * np.linalg.norm(z) 
+                     and d <= res_tol * rho * np.linalg.norm(u))
+        if converged or active is not None:
+            gap, const, corr, primal = _lasso_dual(
+                A, y, _expand(z, index, num_coef), alpha)
+            if converged and np.all(gap <= tol * primal):
+                n_iter = it
+                break
+        if active is not None:
+            active &= _gap_safe_active(num_cell, alpha, gap, const, corr,
+                                       col_norm)
+            drop = ~active[index]
+            z[drop] = 0
+            if np.count_nonzero(drop) >= 0.1 * len(index):
+                keep = ~drop
+                index, z, u = index[keep], z[keep], u[keep]
+                theta, theta_y = theta[:, keep], theta_y[keep]
+                kernel = theta @ theta.T
+                factor = cho_factor(kernel + num_cell * rho * eye)
+                drop = np.zeros(len(index), dtype = bool)
+        if r > 10 * d or d > 10 * r:
+            scale = 2 if r > 10 * d else 0.5
+            rho, u = rho * scale, u / scale
+            factor = cho_factor(kernel + num_cell * rho * eye)
+    z = _expand(z, index, num_coef)
+    z = z.ravel() if k == 1 else z
+    return (z, n_iter) if return_n_iter else z
+
+# Sparse recovery solver registry
+SOLVERS = {}
+
+def register_solver(name, matrix_free = False, lasso_objective = True):
+    '''
+    Decorator adding a solver to SOLVERS under name, so it can be selected
+    with solver = name in reconstruct and large_img_experiment.
+    Every solver is called as
+
+        s = solve(theta, y, alpha, tol, max_iter, s0, state)
+
+    theta : (num_cell, num_coef) matrix, or LinearOperator if matrix_free.
+    y : (num_cell, k) observed samples, one column per problem.
+    alpha : penalty (or sparsity level, see omp_solver).
+    tol, max_iter : stopping criterion of the solver.
+    s0 : (num_coef, k) warm start, or None to start from zero.
+    state : dict kept across calls on the same theta, where the solver
+        stores what it can reuse (Gram matrix, Lipschitz constant, ...), 
+        plus 'formulation' and 'gram_seconds' for reconstruct's info and
+        'n_iter', the iterations run by this call (max_iter if it did not
+        converge).
+    s : (num_coef, k) coefficients.
+
+    Parameters
+    ----------
+    name : String
+        Name of the solver.
+
+    matrix_free : bool
+        If True the solver only uses theta through its products, so for dct
+        it is given the W @ IDCT operator instead of the dense theta.
+        Default set to False.
+
+    lasso_objective : bool
+        If True the solver minimizes the LASSO objective, so gap_safe_screen
+        applies to it. Default set to True.
+    '''
+    def register(solve):
+        solve.matrix_free = matrix_free
+        solve.lasso_objective = lasso_objective
+        SOLVERS[name] = solve
+        return solve
+    return register
+
+@register_solver('lasso')
+def lasso_solver(theta, y, alpha, tol = 1e-4, max_iter = 1000, s0 = None,
+                 state = None):
+    '''
+    sklearn Lasso (coordinate descent), one target per thread.
+    The Gram matrix theta^T @ theta is precomputed when theta is taller 
+    than wide, or when state['formulation'] is already 'primal'.
+    Stops on the relative duality gap like fista and admm (see 
+    lasso_relative_gap) rather than on sklearn's tol * ||y||^2 / num_cell,
+    which a warm start from a larger alpha often meets before any 
+    iteration.
+    '''
+    state = {} if state is None else state
+    if 'gram' not in state:
+        start = time.perf_counter()
+        num_cell, num_coef = theta.shape
+        # Coordinate descent works on the columns of a Fortran ordered theta
+        state['theta'] = np.asfortranarray(theta)
+        if (state.get('formulation') == 'primal' or num_cell > num_coef) :
+            state['formulation'] = 'primal'
+            state['gram'] = state['theta'].T @ state['theta']
+        else :
+            state['formulation'] = 'theta'
+            state['gram'] = False
+        state['gram_seconds'] = time.perf_counter() - start
+    theta = state['theta']
+    A = aslinearoperator(theta)
+    num_cell, num_coef = theta.shape
+
+    k = y.shape[1]
+    minis = [Lasso(alpha = alpha, fit_intercept = False, warm_start = True,
+                   precompute = state['gram'], copy_X = False)
+             for j in range(k)]
+    for j, mini in enumerate(minis):
+        mini.coef_ = np.zeros(num_coef, dtype = theta.dtype) if s0 is None \
+            else np.array(s0[:, j], dtype = theta.dtype)
+    y_list = [np.ascontiguousarray(y[:, j]) for j in range(k)]
+
+    def fit(j):
+        # sklearn's gap target tol * ||y||^2 / num_cell, rescaled to 
+        # tol * primal with the primal objective of the current 
+        # coefficients. The primal decreases as it fits, so the fit is 
+        # resumed until the relative gap target is met.
+        mini, y_j = minis[j], y_list[j]
+        y_norm2 = max(float(y_j @ y_j), 1e-300)
+        n_iter = 0
+        while n_iter < max_iter:
+            gap, _, _, primal = _lasso_dual(A, y_j[:, None],
+                                            mini.coef_[:, None], alpha)
+            if gap[0] <= tol * primal[0]:
+                break
+            mini.set_params(tol = tol * primal[0] * num_cell / y_norm2,
+                            max_iter = max_iter - n_iter)
+            mini.fit(theta, y_j, check_input = False)
+            n_iter += mini.n_iter_
+        return n_iter
+
+    # Targets are fitted in parallel threads (coordinate descent releases
+    # the GIL), sharing theta and the Gram matrix.
+    with ThreadPoolExecutor(max_workers = min(k, os.cpu_count() or 1)) \
+            as executor:
+        state['n_iter'] = max(executor.map(fit, range(k)))
+    return np.column_stack([mini.coef_ for mini in minis])
+
+@register_solver('fista', matrix_free = True)
+def fista_solver(theta, y, alpha, tol = 1e-4, max_iter = 1000, s0 = None,
+                 state = None):
+    '''
+    fista, with the Lipschitz constant computed once per theta.
+    '''
+    state = {} if state is None else state
+    if 'L' not in state:
+        state['formulation'] = 'operator'
+        state['L'] = lipschitz_constant(theta)
+    active = np.ones(theta.shape[1], dtype = bool) if state.get('screen') \
+        else None
+    s, state['n_iter'] = fista(theta, y, alpha, tol, max_iter, s0, state['L'],
+                               return_n_iter = True, active = active,
+                               col_norm = state.get('col_norm'))
+    state['active'] = active
+    return s
+
+@register_solver('admm')
+def admm_solver(theta, y, alpha, tol = 1e-4, max_iter = 1000, s0 = None,
+                state = None):
+    '''
+    admm, with the kernel theta @ theta^T computed once per theta.
+    '''
+    state = {} if state is None else state
+    if 'kernel' not in state:
+        start = time.perf_counter()
+        state['formulation'] = 'dual'
+        state['kernel'] = theta @ theta.T
+        state['gram_seconds'] = time.perf_counter() - start
+    active = np.ones(theta.shape[1], dtype = bool) if state.get('screen') \
+        else None
+    s, state['n_iter'] = admm(theta, y, alpha, tol, max_iter, s0,
+                              state['kernel'], return_n_iter = True,
+                              active = active,
+                              col_norm = state.get('col_norm'))
+    state['active'] = active
+    return s
+
+@register_solver('gram')
+def gram_solver(theta, y, alpha, tol = 1e-4, max_iter = 1000, s0 = None,
+                state = None):
+    '''
+    Precomputed Gram solver. Fits sklearn Lasso on the primal Gram 
+    theta^T @ theta when num_cell >= num_coef, else admm on the dual kernel
+    theta @ theta^T, which stays small when heavily undersampled.
+    '''
+    state = {} if state is None else state
+    num_cell, num_coef = theta.shape
+    if (num_cell < num_coef) :
+        return admm_solver(theta, y, alpha, tol, max_iter, s0, state)
+    state.setdefault('formulation', 'primal')
+    return lasso_solver(theta, y, alpha, tol, max_iter, s0, state)
+
+@register_solver('omp', lasso_objective = False)
+def omp_solver(theta, y, alpha, tol = 1e-4, max_iter = 1000, s0 = None,
+               state = None):
+    '''
+    Orthogonal Matching Pursuit (sklearn), a greedy solver for a fixed 
+    number of nonzero coefficients, alpha * num_cell of them (at least 1,
+    at most num_cell), so the default alpha of reconstruct, 50 / num_cell,
+    keeps 50. Unlike LASSO, a larger alpha gives a denser solution.
+    OMP does not iterate to a tolerance and cannot be warm started, so 
+    tol, max_iter and s0 are unused.
+    '''
+    state = {} if state is None else state
+    num_cell, num_coef = theta.shape
+    num_nonzero = int(round(alpha * num_cell))
+    num_nonzero = max(1, min(num_nonzero, num_cell, num_coef))
+    if 'gram' not in state:
+        start = time.perf_counter()
+        if (num_cell > num_coef) :
+            state['formulation'] = 'primal'
+            state['gram'] = theta.T @ theta
+        else :
+            state['formulation'] = 'theta'
+            state['gram'] = None
+        state['gram_seconds'] = time.perf_counter() - start
+    state['n_iter'] = num_nonzero
+    if state['gram'] is None:
+        s = orthogonal_mp(theta, y, n_nonzero_coefs = num_nonzero)
+    else:
+        s = orthogonal_mp_gram(state['gram'], theta.T @ y,
+                               n_nonzero_coefs = num_nonzero)
+    # sklearn computes in float64 whatever the type of theta
+    return s.reshape(num_coef, -1).astype(theta.dtype, copy = False)
+
+def screened_solve(solve, theta, y, alpha, tol = 1e-4, max_iter = 1000,
+                   s0 = None, state = None):
+    '''
+    Run a registered solver on the columns of theta left by gap_safe_screen.
+    Screening is done once up front (from s0), then the solver runs once
+    with the full max_iter budget. The iterative solvers (fista, admm) keep
+    screening inside their own loop from the correlations of their duality
+    gap checks, so the solve is never restarted. The screened coefficients
+    are exactly zero at the optimum, so the solution is that of the full
+    problem, and when nothing gets screened it is the same as without
+    screening.
+
+    Parameters
+    ----------
+    solve : function
+        Solver from SOLVERS.
+
+    theta : array_like or LinearOperator
+        (num_cell, num_coef) shape matrix, or operator for a matrix-free
+        solver, in which case state['col_norm'] must be set.
+
+    y : array_like
+        (num_cell, k) shape. Observed samples.
+
+    alpha : float
+        Penalty for the L1 norm of the coefficients.
+
+    tol : float
+        Tolerance passed to the solver. Default set to 1e-4.
+
+    max_iter : int
+        Maximum number of solver iterations. Default set to 1000.
+
+    s0 : array_like
+        (num_coef, k) warm start. Default set to None, which starts from zero.
+
+    state : dict
+        Kept across calls on the same theta. Holds the column norms of theta
+        and the state of solve for the current active set. 'n_iter' is set 
+        to the number of solver iterations.
+
+    Returns
+    ----------
+    s : array_like
+        (num_coef, k) shape coefficients.
+
+    num_screened : int
+        Number of coefficients screened out by the end of the solve.
+    '''
+    state = {} if state is None else state
+    num_cell, num_coef = theta.shape
+    k = y.shape[1]
+    if 'col_norm' not in state:
+        state['col_norm'] = np.linalg.norm(theta, axis = 0)
+    s = np.zeros((num_coef, k), dtype = y.dtype) if s0 is None \
+        else np.array(s0, dtype = y.dtype).reshape(num_coef, k)
+
+    active, gap = gap_safe_screen(theta, y, s, alpha, state['col_norm'])
+    s[~active] = 0
+    state['n_iter'] = 0
+    index = np.flatnonzero(active)
+    if len(index) == 0:
+        return s, num_coef
+    # The solver state (e.g. Gram matrix) belongs to one active set
+    if not np.array_equal(state.get('index'), index):
+        state['index'], state['sub_state'] = index, {}
+        if len(index) == num_coef:
+            state['theta'] = theta
+        elif isinstance(theta, LinearOperator):
+            state['theta'] = _column_subset(theta, None, index)
+        else:
+            state['theta'] = theta[:, index]
+    sub_state = state['sub_state']
+    sub_state['screen'] = True
+    sub_state['col_norm'] = state['col_norm'][index]
+    s_active = solve(state['theta'], y, alpha, tol, max_iter, s[index],
+                     sub_state)
+    s[index] = s_active.reshape(len(index), k)
+    state['formulation'] = sub_state.get('formulation')
+    state['gram_seconds'] = sub_state.pop('gram_seconds', 0.0)
+    state['n_iter'] = sub_state.pop('n_iter')
+    # screened inside the solver loop
+    inner = sub_state.pop('active', None)
+    if inner is not None:
+        active[index] = inner
+    return s, int(num_coef - np.count_nonzero(active))
+
+# Cache of transformed design matrix (theta) shared across alpha values
+class ThetaCache:
+    '''
+    In-process LRU cache for the transformed design matrix theta.
+    Entries are keyed by a hash of W together with the transform parameters,
+    and the least recently used entries are evicted once the total size of
+    the cached arrays exceeds max_bytes.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Upper bound on the total size of cached arrays in bytes.
+        Default set to 256 MiB.
+    '''
+
+    def __init__(self, max_bytes = 2 ** 28):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(W, method, dwt_type = None, lv = None):
+        '''
+        Hash W (content, shape and dtype) with the transform parameters.
+        '''
+        if isinstance(W, PixelObservation):
+            # the indices and scale define a pixel observation
+            data = np.ascontiguousarray(W.index)
+            extra = ('pixel', W.scale)
+        elif isinstance(W, SRHTObservation):
+            # the signs, rows and scale define a srht observation
+            data = np.concatenate([W.signs.astype(np.int64), W.index])
+            extra = ('srht', W.scale)
+        else:
+            data = W = np.ascontiguousarray(W)
+            extra = ()
+        digest = hashlib.blake2b(data.data, digest_size = 16).hexdigest()
+        if (method == 'dct'):
+            dwt_type, lv = None, None
+        return (digest, W.shape, W.dtype.str, method, dwt_type, lv) + extra
+
+    def get(self, key):
+        '''
+        Return cached entry for key, or None if it is not cached.
+        '''
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, theta, *extra):
+        '''
+        Store theta (and any extra data needed to invert the transform)
+        under key, evicting least recently used entries to fit max_bytes.
+        '''
+        if theta.nbytes > self.max_bytes:
+            return
+        # cached theta is shared between calls, so it must not be modified
+        theta.flags.writeable = False
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = (theta, *extra)
+            self.nbytes += theta.nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last = False)
+                self.nbytes -= evicted[0].nbytes
+
+    def clear(self):
+        '''
+        Drop every cached entry and reset the counters.
+        '''
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        '''
+        Return dict of hits, misses, number of entries and bytes in use.
+        '''
+        with self._lock:
+            return {'hits' : self.hits, 'misses' : self.misses,
+                    'entries' : len(self._entries), 'nbytes' : self.nbytes,
+                    'max_bytes' : self.max_bytes}
+
+theta_cache = ThetaCache()
+
+def dct_theta(W, sample_sz, n, m, cache = False):
+    '''
+    Compute theta, the dct of every row of W, through theta_cache.
+
+    Parameters
+    ----------
+    W : array_like or PixelObservation
+        (num_V1_weights, n, m) shape array. Lists of weighted data.
+
+    sample_sz : int
+        Number of sample collected.
+
+    n : int
+        Height of each data.
+
+    m : int
+        Width of each data.
+
+    cache : bool
+        Look up and store theta in theta_cache. Only pays off when the
+        same W is transformed again. Default set to False.
+
+    Returns
+    ----------
+    theta : array_like
+        (sample_sz, n*m) shape array.
+    '''
+    key = ThetaCache.key(W, 'dct') if cache else None
+    entry = theta_cache.get(key) if cache else None
+    if entry is not None:
+        return entry[0]
+
+    if isinstance(W, PixelObservation):
+        # The dct of a one-hot row at (p, q) is the outer product of
+        # columns p and q of the 1D dct matrices
+        row, col = np.unravel_index(W.index, (n, m))
+        dct_n = fft.dct(np.eye(n, dtype = W.dtype), norm = 'ortho', axis = 0)
+        dct_m = fft.dct(np.eye(m, dtype = W.dtype), norm = 'ortho', axis = 0)
+        theta = W.scale * dct_n[:, row].T[:, :, None] * dct_m[:, col].T[:, None, :]
+    else:
+        theta = fft.dctn(W.reshape(sample_sz, n, m), norm = 'ortho',
+                         axes = [1, 2])
+    theta = theta.reshape(sample_sz, n * m)
+    if cache:
+        theta_cache.put(key, theta)
+    return theta
+
+@lru_cache(maxsize = 64)
+def wavelet_coeff_layout(dim, dwt_type, lv, mode = 'zero'):
+    '''
+    Layout of the raveled wavelet coefficients of a (n, m) array.
+    It only depends on the shape and the transform, so it is computed once
+    per (dim, dwt_type, lv, mode) and reused.
+
+    Parameters
+    ----------
+    dim : tuple
+        (n, m) shape of the data.
+
+    dwt_type : String
+        type of dwt method to be used
+        ex)'haar', 'db1', 'db2', ...
+
+    lv : int
+        Generate level of signal frequencies when dwt is used.
+
+    mode : String
+        Signal extension mode of the transform. Default set to 'zero'.
+
+    Returns
+    ----------
+    num_coef : int
+        Total number of wavelet coefficients.
+
+    coeff_slices : list
+        Slices of each wavelet subband in the raveled coefficients.
+
+    coeff_shapes : list
+        Shape of each wavelet subband.
+    '''
+    dwt_sample = wavedecn(np.zeros(dim), wavelet = dwt_type, level = lv,
+                          mode = mode)
+    coeff, coeff_slices, coeff_shapes = pywt.ravel_coeffs(dwt_sample)
+    return len(coeff), coeff_slices, coeff_shapes
+
+def dwt_theta(W, sample_sz, dwt_type, lv, cache = False):
+    '''
+    Compute theta, the raveled wavelet coefficients of every row of W,
+    through theta_cache.
+
+    Parameters
+    ----------
+    W : array_like or PixelObservation
+        (num_V1_weights, n, m) shape array. Lists of weighted data.
+
+    sample_sz : int
+        Number of sample collected.
+
+    dwt_type : String
+        type of dwt method to be used
+        ex)'haar', 'db1', 'db2', ...
+
+    lv : int
+        Generate level of signal frequencies when dwt is used.
+
+    cache : bool
+        Look up and store theta in theta_cache. Only pays off when the
+        same W is transformed again. Default set to False.
+
+    Returns
+    ----------
+    theta : array_like
+        (sample_sz, num_coef) shape array.
+
+    coeff_slices : list
+        Slices of each wavelet subband in a row of theta.
+
+    coeff_shapes : list
+        Shape of each wavelet subband.
+    '''
+    key = ThetaCache.key(W, 'dwt', dwt_type, lv) if cache else None
+    entry = theta_cache.get(key) if cache else None
+    if entry is not None:
+        return entry
+
+    num_coef, coeff_slices, coeff_shapes = wavelet_coeff_layout(
+        W.shape[1:], dwt_type, lv)
+    if isinstance(W, (PixelObservation, SRHTObservation)):
+        W = W.toarray()
+
+    # Transform every row at once over the last two axes, then copy each
+    # subband into its columns of theta
+    coeffs = wavedecn(W, wavelet = dwt_type, level = lv, mode = 'zero',
+                      axes = (1, 2))
+    theta = np.empty((sample_sz, num_coef), dtype = W.dtype)
+    theta[:, coeff_slices[0]] = coeffs[0].reshape(sample_sz, -1)
+    for detail, detail_slices in zip(coeffs[1:], coeff_slices[1:]):
+        for band, coeff_slice in detail_slices.items():
+            theta[:, coeff_slice] = detail[band].reshape(sample_sz, -1)
+
+    if cache:
+        theta_cache.put(key, theta, coeff_slices, coeff_shapes)
+    return theta, coeff_slices, coeff_shapes
 
 # Reconstruction (Current Methods: Fourier Base Transform, Wavelet Transform)
-def fourier_reconstruct(W, y, alpha, sample_sz, n, m, fit_intercept) :
+def fourier_reconstruct(W, y, alpha, sample_sz, n, m, fit_intercept,
+                        solver = 'lasso') :
     ''' 
     Reconstruct signals through cosine transform.
     
     Parameters
     ----------
-    W : array_like
+    W : array_like or PixelObservation
         (num_V1_weights, n*m) shape array. Lists of weighted data.
         
     y : vector
@@ -209,6 +1581,12 @@ def fourier_reconstruct(W, y, alpha, sample_sz, n, m, fit_intercept) :
     fit_intercept : bool
         default set to false to prevent 
         LASSO function to calculate intercept for model.
+
+    solver : String
+        Solver used to find the sparse coefficients, any name in SOLVERS.
+        'fista' runs accelerated proximal gradient on the matrix-free
+        W @ IDCT operator, so theta is never formed.
+        Default set to 'lasso'.
         
     Returns
     ----------
@@ -216,30 +1594,17 @@ def fourier_reconstruct(W, y, alpha, sample_sz, n, m, fit_intercept) :
         (n, m) shape array. Reconstructed image pixel array.
     '''
     
-    # Ignore convergence warning to allow convergence warning not filling up 
-    # all spaces when testing
-    warnings.filterwarnings('ignore', category=ConvergenceWarning)
-    
-    theta = fft.dctn(W.reshape(sample_sz, n, m), norm = 'ortho', axes = [1, 2])
-    theta = theta.reshape(sample_sz, n * m)
-
-    ## Initialize Lasso and Fit data
-    mini = Lasso(alpha = alpha, fit_intercept = fit_intercept)
-    mini.fit(theta, y)
-
-    ## Retrieve sparse vector s
-    s = mini.coef_
-    img = fft.idctn(s.reshape(n, m), norm='ortho', axes=[0,1])
-    return img
+    return reconstruct_path(W, y, [alpha], fit_intercept, 'dct',
+                            solver = solver)[0]
 
 def wavelet_reconstruct(W, y, alpha, sample_sz, n, m,
-                        fit_intercept, dwt_type, lv) :
+                        fit_intercept, dwt_type, lv, solver = 'lasso') :
     ''' 
     Reconstruct signals through wavelet transform.
     
     Parameters
     ----------
-    W : array_like
+    W : array_like or PixelObservation
         (num_V1_weights, n*m) shape array. Lists of weighted data.
         
     y : vector
@@ -268,6 +1633,10 @@ def wavelet_reconstruct(W, y, alpha, sample_sz, n, m,
         
     lv : int
         Generate level of signal frequencies when dwt is used.
+
+    solver : String
+        Solver used to find the sparse coefficients, any name in SOLVERS.
+        Default set to 'lasso'.
         
     Returns
     ----------
@@ -275,31 +1644,12 @@ def wavelet_reconstruct(W, y, alpha, sample_sz, n, m,
         (n, m) shape array. Reconstructed image pixel array.
     '''
     
-    # Ignore convergence warning to allow convergence warning not filling up 
-    # all spaces when testing
-    warnings.filterwarnings('ignore', category=ConvergenceWarning)
-    dwt_sample = wavedecn(W[0], wavelet = dwt_type, level = lv, mode = 'zero')
-    coeff, coeff_slices, coeff_shapes = pywt.ravel_coeffs(dwt_sample)
-    theta = np.zeros((len(W), len(coeff)))
-    theta[0, :] = coeff 
-
-    # Loop the wavedecn to fill theta
-    for i in range(sample_sz):
-        theta_i = wavedecn(W[i], wavelet= dwt_type, level = lv, mode = 'zero')
-        theta[i, :] = pywt.ravel_coeffs(theta_i)[0]
-
-    mini = Lasso(alpha = alpha, fit_intercept = False)
-    mini.fit(theta, y)
-
-    s = mini.coef_
-
-    s_unravel = pywt.unravel_coeffs(s, coeff_slices, coeff_shapes)
-    img = pywt.waverecn(s_unravel, dwt_type, mode = 'zero')
-    
-    return img
+    return reconstruct_path(W, y, [alpha], fit_intercept, 'dwt', lv, dwt_type,
+                            solver)[0]
 
 def generate_observations(img_arr, num_cell, observation, cell_size = None,
-                          sparse_freq = None):
+                          sparse_freq = None, dtype = np.float64, rng = None,
+                          chunk_size = None, W_path = None):
     ''' 
     Helper function to generate observations using the specified technique.
     
@@ -315,7 +1665,7 @@ def generate_observations(img_arr, num_cell, observation, cell_size = None,
     observation : String
         Observation technique that are going to be used to 
         collect sample for reconstruction. Default set up to 'pixel'
-        Supported observation : ['pixel', 'gaussian', 'V1'].
+        Supported observation : ['pixel', 'gaussian', 'srht', 'V1'].
     
     cell_size : int
         Determines field size of opened and closed blob of data. 
@@ -325,11 +1675,31 @@ def generate_observations(img_arr, num_cell, observation, cell_size = None,
         Determines filed frequency on how 
         frequently opened and closed area would appear. 
         Affect the data training.
+
+    dtype : data-type
+        Floating point type of W and y, np.float32 halves their memory.
+        Default set to np.float64.
+
+    rng : np.random.Generator
+        Generator to draw the observation from, see check_rng. Pass one 
+        Generator per task (e.g. spawned from one np.random.SeedSequence) to
+        generate observations in parallel reproducibly.
+        Default set to None, drawn from the global numpy random state.
+
+    chunk_size : int
+        Generate V1 and gaussian W in chunks of chunk_size rows, see
+        stream_observation. Default set to None, all at once.
+
+    W_path : String
+        With chunk_size, .npy memmap path W is written to.
+        Default set to None, W is kept in memory.
     
     Returns
     ----------
-    W : array_like
+    W : array_like or PixelObservation
         (num_V1_weights, n*m) shape array. Lists of weighted data.
+        PixelObservation for pixel observation, SRHTObservation for srht
+        observation.
         
     y : vector
         (num_V1_weights/sample_size, 1) shape. Dot product of W and image.
@@ -347,24 +1717,31 @@ def generate_observations(img_arr, num_cell, observation, cell_size = None,
         print(type(num_cell))
         sys.exit(0)
     if (observation.lower() == "v1"):
-        W, y = generate_V1_observation(img_arr, num_cell, cell_size, sparse_freq)
+        W, y = generate_V1_observation(img_arr, num_cell, cell_size, sparse_freq,
+                                       dtype, rng, chunk_size, W_path)
     elif (observation.lower() == "gaussian"):
-        W, y = generate_gaussian_observation(img_arr, num_cell)
+        W, y = generate_gaussian_observation(img_arr, num_cell, dtype, rng,
+                                             chunk_size, W_path)
     elif (observation.lower() == "pixel"):
-        W, y = generate_pixel_observation(img_arr, num_cell)
+        W, y = generate_pixel_observation(img_arr, num_cell, dtype, rng)
+    elif (observation.lower() == "srht"):
+        W, y = generate_srht_observation(img_arr, num_cell, dtype, rng)
     else:
         print("This obervation technique is currently not supported")
-        print("Please use valid observation: ['pixel', 'gaussian', 'V1']")
+        print("Please use valid observation:"
+              " ['pixel', 'gaussian', 'srht', 'V1']")
     return W, y
 
 def reconstruct(W, y, alpha = None, fit_intercept = False, method = 'dct',
-                lv = 4, dwt_type = 'db2'):
+                lv = 4, dwt_type = 'db2', solver = 'lasso',
+                return_info = False, dtype = None, screen = False,
+                tol = 1e-4, max_iter = 1000, cache = False):
     ''' 
     Reconstruct gray-scaled image using sample data fitting into LASSO model.
     
     Parameters
     ----------
-    W : array_like
+    W : array_like or PixelObservation
         (num_V1_weights, n*m) shape array. Lists of weighted data.
         
     y : vector
@@ -389,11 +1766,63 @@ def reconstruct(W, y, alpha = None, fit_intercept = False, method = 'dct',
     dwt_type : String
         type of dwt method to be used
         Default set to db2
+
+    solver : String
+        Solver used to find the sparse coefficients, any name in SOLVERS.
+        'lasso' fits sklearn Lasso on the dense theta matrix.
+        'fista' is matrix-free and does not build theta for dct, which allows
+        reconstruction of large images in one piece.
+        'admm' solves the dual (kernel) form, see admm.
+        'omp' is greedy and keeps alpha * num_cell nonzero coefficients,
+        see omp_solver.
+        'gram' precomputes a Gram matrix and picks the formulation from the 
+        shape of theta: the primal Gram theta^T @ theta (sklearn Lasso) when
+        num_cell >= num_coef, else the dual kernel theta @ theta^T (admm), 
+        which stays small when the image is heavily undersampled.
+        Default set to 'lasso'
+
+    return_info : bool
+        Also return how the problem was solved. Default set to False.
+
+    dtype : data-type
+        Floating point type W, y and theta are solved in (e.g. np.float32). 
+        Default set to None, which keeps the type of W.
+
+    screen : bool
+        Drop coefficients that are provably zero with gap_safe_screen, up
+        front and inside the fista and admm loops (see screened_solve).
+        Only applies to LASSO solvers. With the matrix-free dct of fista,
+        the column norms come from dct_col_norm.
+        Default set to False.
+
+    tol : float
+        Relative duality gap target. Every LASSO solver stops once the
+        duality gap is below tol times the primal objective (see
+        lasso_relative_gap), so 'converged' in info is False only when 
+        max_iter runs out first. Default set to 1e-4.
+
+    max_iter : int
+        Maximum number of solver iterations. Default set to 1000.
+
+    cache : bool
+        Keep theta in theta_cache, for a W that is reconstructed again
+        (e.g. fixed weights shared by every part of large_img_experiment).
+        Default set to False.
         
     Returns
     ----------
     img : array_like
         (n, m) shape array. Reconstructed image pixel array
+
+    info : dict
+        Only returned if return_info is True. 'solver', 'formulation' 
+        ('theta', 'operator', 'primal' or 'dual'), 'gram_seconds' (time to
+        build the Gram/kernel matrix), 'screened' (number of coefficients 
+        screened out), and the diagnostics record: 'n_iter' (solver 
+        iterations), 'converged' (gap <= tol, always True for omp), 'gap'
+        (final duality gap relative to the primal objective, see 
+        lasso_relative_gap, nan for omp), 'nnz' (nonzero coefficients) 
+        and 'solve_seconds'.
         
     '''
     
@@ -401,27 +1830,205 @@ def reconstruct(W, y, alpha = None, fit_intercept = False, method = 'dct',
       
     if alpha == None :
         alpha = 1 * 50 / num_cell
+
+    img_list, info_list = reconstruct_path(W, y, [alpha], fit_intercept, method,
+                                           lv, dwt_type, solver,
+                                           return_info = True, dtype = dtype,
+                                           screen = screen, tol = tol,
+                                           max_iter = max_iter, cache = cache)
+    if return_info:
+        return img_list[0], info_list[0]
+    return img_list[0]
+
+def reconstruct_path(W, y, alpha_list, fit_intercept = False, method = 'dct',
+                     lv = 4, dwt_type = 'db2', solver = 'lasso',
+                     return_info = False, dtype = None, screen = False,
+                     tol = 1e-4, max_iter = 1000, cache = False):
+    ''' 
+    Reconstruct gray-scaled image for every alpha in alpha_list.
+    theta (or the fista operator) is built once, and the alphas are solved
+    from largest to smallest, each one warm-started from the coefficients
+    of the previous alpha.
+    
+    Parameters
+    ----------
+    W : array_like or PixelObservation
+        (num_V1_weights, n*m) shape array. Lists of weighted data.
         
-    if fit_intercept:
-        raise Exception("fit_intercept = True not implemented")
+    y : vector
+        (num_V1_weights/sample_size, 1) shape. Dot product of W and image.
+        (num_V1_weights/sample_size, k) shape to reconstruct k images
+        observed by the same W (e.g. rgb channels) in one solve.
+        
+    alpha_list : List of float
+        Penalties for fitting data onto LASSO function to search 
+        for significant coefficents.
     
-    if (method == 'dct') :
-        img = fourier_reconstruct(W, y, alpha, num_cell, n, m, fit_intercept)
-    elif (method == 'dwt') :
-        img = wavelet_reconstruct(W, y, alpha, num_cell, n, m,
-                                  fit_intercept, dwt_type, lv)
+    fit_intercept : bool
+        Default set to false to prevent LASSO function 
+        to calculate intercept for model.
+    
+    method : String
+        Currently supporting dct and dwt (discrete cosine/wavelet transform).
+        Default set to dct
+        
+    lv : int
+        Generate level of signal frequencies when dwt is used
+        Default set to 4
+        
+    dwt_type : String
+        type of dwt method to be used
+        Default set to db2
+
+    solver : String
+        Solver used to find the sparse coefficients, see reconstruct.
+        Default set to 'lasso'
+
+    return_info : bool
+        Also return how each alpha was solved, see reconstruct.
+        The Gram/kernel matrix is built once, so its time is only 
+        reported on the first alpha solved (the largest).
+        Default set to False.
+
+    dtype : data-type
+        Floating point type W, y and theta are solved in, see reconstruct.
+        Default set to None, which keeps the type of W.
 
-        # Reform the image using sparse vector s with inverse discrete cosine
+    screen : bool
+        Use gap safe screening, see reconstruct. Each alpha is screened 
+        from the solution of the previous one. Default set to False.
+
+    tol : float
+        Relative duality gap target, see reconstruct. Default set to 1e-4.
+
+    max_iter : int
+        Maximum number of solver iterations for each alpha. 
+        Default set to 1000.
+
+    cache : bool
+        Keep theta in theta_cache, see reconstruct. Default set to False.
         
-    if fit_intercept:
-        reform += mini.intercept_ # not sure this is right
+    Returns
+    ----------
+    img_list : List of array_like
+        (n, m) shape reconstructed image for each alpha, 
+        in the order of alpha_list. (n, m, k) shape if y has k columns.
+
+    info_list : List of dict
+        Only returned if return_info is True. One dict for each alpha, 
+        in the order of alpha_list.
+    '''
     
-    #return reformed img
-    return img
+    num_cell, n, m = W.shape
+        
+    if fit_intercept:
+        raise Exception("fit_intercept = True not implemented")
+
+    if (solver not in SOLVERS):
+        raise Exception(f"solver = {solver} not supported."
+                        f" Please use valid solver: {list(SOLVERS)}")
+    solve = SOLVERS[solver]
+
+    if dtype is not None:
+        W = W.astype(dtype, copy = False)
+
+    if (method == 'dct' and solve.matrix_free) :
+        theta = dct_operator(W, n, m)
+    elif (method == 'dct') :
+        theta = dct_theta(W, num_cell, n, m, cache = cache)
+    elif (method == 'dwt') :
+        theta, coeff_slices, coeff_shapes = dwt_theta(W, num_cell, dwt_type,
+                                                      lv, cache = cache)
+
+    # Every column of y is its own target, all sharing theta
+    y = np.asarray(y, dtype = theta.dtype).reshape(num_cell, -1)
+    k = y.shape[1]
+
+    screen = screen and solve.lasso_objective
+
+    s = None
+    state = {}
+    if screen and isinstance(theta, LinearOperator):
+        state['col_norm'] = dct_col_norm(W, n, m)
+    img_list = [None] * len(alpha_list)
+    info_list = [None] * len(alpha_list)
+    # Solve from the largest alpha, whose solution is the sparsest
+    for i in np.argsort(alpha_list)[::-1]:
+        start = time.perf_counter()
+        # Not converging is reported by the relative gap in info instead
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category = ConvergenceWarning)
+            if screen:
+                s, num_screened = screened_solve(solve, theta, y, 
+                                                 alpha_list[i], tol, max_iter,
+                                                 s, state)
+            else:
+                s, num_screened = solve(theta, y, alpha_list[i], tol,
+                                        max_iter, s, state), 0
+        s = s.reshape(-1, k)
+        # The Gram/kernel matrix is only built on the first call
+        gram_seconds = state.pop('gram_seconds', 0.0)
+        solve_seconds = time.perf_counter() - start - gram_seconds
+
+        # Relative duality gap of the worst target
+        if solve.lasso_objective:
+            gap = np.max(lasso_relative_gap(aslinearoperator(theta), y, s,
+                                            alpha_list[i]))
+        else:
+            gap = np.nan
+        n_iter = state.pop('n_iter')
+        info_list[i] = {'solver': solver, 
+                        'formulation': state.get('formulation'),
+                        'gram_seconds': gram_seconds,
+                        'screened': num_screened,
+                        'n_iter': n_iter,
+                        'converged': bool(gap <= tol)
+                                     or not solve.lasso_objective,
+                        'gap': float(gap),
+                        'nnz': int(np.count_nonzero(s)),
+                        'solve_seconds': solve_seconds}
+            
+        if (method == 'dct') :
+            img = fft.idctn(s.reshape(n, m, k), norm='ortho', axes=[0,1])
+        else :
+            img = np.stack([pywt.waverecn(
+                pywt.unravel_coeffs(s[:, j], coeff_slices, coeff_shapes),
+                dwt_type, mode = 'zero') for j in range(k)], axis = -1)
+        img_list[i] = img[:, :, 0] if k == 1 else img
+
+    if return_info:
+        return img_list, info_list
+    return img_list
+
+def merge_diagnostics(info_list):
+    '''
+    Combine the diagnostics records of several reconstructions (e.g. the
+    parts of large_img_experiment) into one record.
+
+    Parameters
+    ----------
+    info_list : List of dict
+        info returned by reconstruct or reconstruct_path.
+
+    Returns
+    ----------
+    record : dict
+        'n_iter' (most iterations of any part), 'converged' (every part
+        converged), 'gap' (largest relative duality gap), 'nnz' (total 
+        nonzero coefficients) and 'solve_seconds' (total).
+    '''
+    return {'n_iter': max(info['n_iter'] for info in info_list),
+            'converged': all(info['converged'] for info in info_list),
+            'gap': max(info['gap'] for info in info_list),
+            'nnz': sum(info['nnz'] for info in info_list),
+            'solve_seconds': sum(info['solve_seconds'] for info in info_list)}
 
 def color_experiment(img_arr, num_cell, cell_size = None, sparse_freq = None,
                      alpha = None, fit_intercept = False, method = 'dct',
-                     observation = 'pixel', lv = 4, dwt_type = 'db2', W = None) :
+                     observation = 'pixel', lv = 4, dwt_type = 'db2', W = None,
+                     solver = 'lasso', dtype = np.float64, screen = False,
+                     tol = 1e-4, max_iter = 1000, return_info = False,
+                     rng = None, chunk_size = None, cache = False) :
     ''' 
     Reconstruct colored (RGB) image with sample data.
     
@@ -442,9 +2049,11 @@ def color_experiment(img_arr, num_cell, cell_size = None, sparse_freq = None,
         Determines filed frequency on how frequently opened and 
         closed area would appear. Affect the data training.
       
-    alpha : float
+    alpha : float or List of float
         Penalty for fitting data onto LASSO function to search 
-        for significant coefficents.
+        for significant coefficents. If a list is given, every alpha is
+        solved on the same observation with warm starts (see 
+        reconstruct_path) and a list of images is returned.
     
     fit_intercept : bool
         Parameter for LASSO function. Automatically adjust intercept 
@@ -458,7 +2067,7 @@ def color_experiment(img_arr, num_cell, cell_size = None, sparse_freq = None,
     observation : String
         Observation technique that are going to be used to collect samples. 
         Default set up to 'pixel'.
-        Supported observation : ['pixel', 'gaussian', 'V1'].
+        Supported observation : ['pixel', 'gaussian', 'srht', 'V1'].
     
     lv : int
         Determines level of frequency details for wavelet transform. 
@@ -468,14 +2077,56 @@ def color_experiment(img_arr, num_cell, cell_size = None, sparse_freq = None,
         Determines types of wavelet transform when dwt is used for its method.
         Not used for dct.
 
+    W : array_like or PixelObservation
+        (num_cell, n, m) shape array. Observation shared by all 3 channels.
+        Default set to None, which generates it from the first channel.
+
+    solver : String
+        Solver used for the reconstruction, see reconstruct.
+        Default set to 'lasso'.
+
+    dtype : data-type
+        Floating point type of the observation and the reconstruction.
+        np.float32 halves the memory and bandwidth of W and theta.
+        Default set to np.float64.
+
+    screen : bool
+        Use gap safe screening, see reconstruct. Default set to False.
+
+    tol : float
+        Relative duality gap target, see reconstruct. Default set to 1e-4.
+
+    max_iter : int
+        Maximum number of solver iterations. Default set to 1000.
+
+    return_info : bool
+        Also return the reconstruction info, see reconstruct.
+        Default set to False.
+
+    rng : np.random.Generator
+        Generator to draw the observation from if W is None, see check_rng.
+        Default set to None, drawn from the global numpy random state.
+
+    chunk_size : int
+        Generate the observation in chunks of rows if W is None, see 
+        generate_observations. Default set to None, all at once.
+
+    cache : bool
+        Keep theta in theta_cache, see reconstruct. Default set to False.
+
     Returns
     ----------
     img : numpy_array
         (n * m) shape array containing reconstructed RGB image array pixels.
+        List of such arrays, one per alpha, if alpha is a list.
+
+    info : dict
+        Only returned if return_info is True. Info of the 3 channel solve,
+        see reconstruct. List of such dicts, one per alpha, if alpha is a 
+        list.
     '''
 
-    i = 0
-    dim = img_arr[:,:,i].shape
+    dim = img_arr[:,:,0].shape
     n, m = dim
     
     # Computes num_cell if the num_cell is in between 0~1.
@@ -484,45 +2135,267 @@ def color_experiment(img_arr, num_cell, cell_size = None, sparse_freq = None,
         num_cell = int(round(num_cell * n * m))
         
     #alpha parameter is dependent on the number of cell if alpha is not specified
-    if alpha == None :
+    if alpha is None :
         alpha = 1 * 50 / num_cell
 
-    img = np.zeros(img_arr.shape)
+    # A list of alpha reconstructs every alpha on the same observation
+    path = np.ndim(alpha) > 0
+    alpha_list = list(alpha) if path else [alpha]
+    img = np.zeros((len(alpha_list),) + img_arr.shape, dtype = dtype)
+    img_arr = np.asarray(img_arr, dtype = dtype)
 
-    # with same V1 cells generated, reconstruct images for each of 3 rgb 
-    # arrays and append to img
-    while (i < 3):
-        img_arr_pt = img_arr[:,:,i]
-        img_arr_pt_dim = img_arr_pt.shape
-        n_pt, m_pt = img_arr_pt_dim
-        
-        if W is not None:
-            y = generate_Y(W, img_arr_pt)
-        
-        else :
-            W, y = generate_observations(img_arr_pt, num_cell, observation,
-                                     cell_size, sparse_freq)
-            
-        if (method == 'dct') :
-            reconst = reconstruct(W, y, alpha, method = method)
-        else :
-            reconst = reconstruct(W, y, alpha, method = method,
-                                  lv = lv, dwt_type = dwt_type)
-        img[:,:,i] = reconst
-        i+=1
+    # with same V1 cells generated for all 3 rgb arrays, observe each 
+    # channel and reconstruct them together as one multi target problem
+    if W is None:
+        W, y = generate_observations(img_arr[:,:,0], num_cell, observation,
+                                     cell_size, sparse_freq, dtype, rng,
+                                     chunk_size)
+    W = W.astype(dtype, copy = False)
+    y = np.hstack([generate_Y(W, img_arr[:,:,i]) for i in range(3)])
+
+    reconst, info_list = reconstruct_path(W, y, alpha_list, method = method,
+                                          lv = lv, dwt_type = dwt_type,
+                                          solver = solver, return_info = True,
+                                          screen = screen, tol = tol,
+                                          max_iter = max_iter, cache = cache)
+    for j, reconst_alpha in enumerate(reconst):
+        img[j] = reconst_alpha
         
     # Fix any over/underestimated pixel between 0~255
     img[img < 0] = 0
     img[img > 255] = 255
     img = np.round(img).astype(int)
-    return img
+    if return_info:
+        return (list(img), info_list) if path else (img[0], info_list[0])
+    return list(img) if path else img[0]
+
+
+def _part_rng(root, pt):
+    '''
+    Generator of part pt of a tiled reconstruction, the pt-th child of the
+    root SeedSequence. Children are derived on demand, so a reconstruction
+    with millions of parts never holds all of their generators.
+    '''
+    return np.random.default_rng(
+        np.random.SeedSequence(root.entropy, spawn_key = (pt,)))
 
+# BLAS thread limits and fixed weights of a tile worker, kept for the 
+# life of the worker
+_worker_limits = None
+_worker_W = None
+
+def _init_worker(threads, W):
+    '''
+    Initializer of the tile workers of large_img_experiment, limits the
+    BLAS and OpenMP threads of the worker process and keeps the fixed 
+    weights W shared by every part, so they are sent once to each worker
+    instead of with every part.
+    '''
+    global _worker_limits, _worker_W
+    _worker_limits = threadpool_limits(limits = threads)
+    _worker_W = W
+
+def _reconstruct_part(img_arr_pt, W, rng, pt, params):
+    '''
+    Reconstruct one part of large_img_experiment. Module level so that it
+    can be sent to worker processes.
+
+    Parameters
+    ----------
+    img_arr_pt : numpy_array
+        (filt_n, filt_m) or (filt_n, filt_m, d) part of the padded image.
+
+    W : numpy_array
+        Fixed weights shared by every part. None if rand_weight, if they
+        were sent to the worker by _init_worker, or if they are served 
+        from the weight bank.
+
+    rng : np.random.Generator
+        Stream of the part.
+
+    pt : int
+        Index of the part, selects its block of the weight bank.
+
+    params : dict
+        Remaining arguments of large_img_experiment.
+
+    Returns
+    ----------
+    reconst : numpy_array
+        (len(alpha_list),) + img_arr_pt.shape reconstruction of the part.
+
+    info_list : List of dict
+        Diagnostics record of the part per alpha.
+    '''
+    p = params
+    # Each batch is served its own block of weights from the bank, or the
+    # first block if the weights are fixed
+    if p['weight_bank'] is not None:
+        W = bank_weights(p['weight_bank'], p['num_cell'], img_arr_pt.shape[:2],
+                         p['cell_size'], p['sparse_freq'], p['bank_seed'],
+                         part = pt if p['rand_weight'] else 0)
+        W = W.astype(p['dtype'], copy = False)
+    elif W is None:
+        W = _worker_W
+    # theta is only worth caching when every part shares W
+    cache = not p['rand_weight']
+
+    # Reconstruct all 3 rgb channels if color
+    if p['color'] :
+        return color_experiment(
+            img_arr_pt, p['num_cell'], p['cell_size'], p['sparse_freq'],
+            alpha = p['alpha_list'], method = p['method'],
+            observation = p['observation'], lv = p['lv'],
+            dwt_type = p['dwt_type'], W = W, solver = p['solver'],
+            dtype = p['dtype'], screen = p['screen'], tol = p['tol'],
+            max_iter = p['max_iter'], return_info = True, rng = rng,
+            chunk_size = p['chunk_size'], cache = cache)
+
+    # if W is set (fixed or served from the bank), just compute y
+    if W is not None:
+        y = generate_Y(W, img_arr_pt)
+    # else, all W is randomized for each batch of reconstruction
+    else :
+        W, y = generate_observations(img_arr_pt, p['num_cell'],
+                                     p['observation'], p['cell_size'],
+                                     p['sparse_freq'], p['dtype'], rng,
+                                     p['chunk_size'])
+    return reconstruct_path(
+        W, y, p['alpha_list'], method = p['method'], lv = p['lv'],
+        dwt_type = p['dwt_type'], solver = p['solver'], return_info = True,
+        screen = p['screen'], tol = p['tol'], max_iter = p['max_iter'],
+        cache = cache)
+
+def _reconstruct_batch(img_arr_pts, W, params):
+    '''
+    Reconstruct every part of large_img_experiment at once when they share
+    the same W. theta is built once, and each part (and rgb channel) is a
+    column of y, so all parts are solved as one multi-target problem.
+
+    Parameters
+    ----------
+    img_arr_pts : numpy_array
+        (num_work, filt_n, filt_m) or (num_work, filt_n, filt_m, d) parts of
+        the padded image.
+
+    W : numpy_array
+        (num_cell, filt_n, filt_m) weights shared by every part.
+
+    params : dict
+        Remaining arguments of large_img_experiment.
+
+    Returns
+    ----------
+    reconst : numpy_array
+        (len(alpha_list),) + img_arr_pts.shape reconstruction of the parts.
+
+    info_list : List of dict
+        Diagnostics record of the whole solve per alpha.
+    '''
+    p = params
+    num_work, filt_n, filt_m = img_arr_pts.shape[:3]
+    # (filt_n * filt_m, num_work * d) columns, channels last as in the parts
+    cols = np.moveaxis(img_arr_pts, 0, 2).reshape(filt_n * filt_m, -1)
+    y = W.reshape(len(W), -1) @ cols
+    img_list, info_list = reconstruct_path(
+        W, y, p['alpha_list'], method = p['method'], lv = p['lv'],
+        dwt_type = p['dwt_type'], solver = p['solver'], return_info = True,
+        screen = p['screen'], tol = p['tol'], max_iter = p['max_iter'])
+    reconst = np.stack([np.moveaxis(img.reshape(img_arr_pts.shape[1:3]
+                                                + (num_work,)
+                                                + img_arr_pts.shape[3:]),
+                                    2, 0)
+                        for img in img_list])
+    return reconst, info_list
+
+def _setup_parts(num_cell, cell_size, sparse_freq, filter_dim, alpha,
+                 method, observation, lv, dwt_type, rand_weight, color,
+                 solver, dtype, screen, tol, max_iter, weight_bank,
+                 bank_seed, rng, chunk_size):
+    '''
+    Setup shared by large_img_experiment and tiled_experiment, arguments
+    as in large_img_experiment. Fills in num_cell and alpha, samples or
+    serves the fixed weights, and draws the root of the part streams from
+    rng, in that order.
+
+    Returns
+    ----------
+    W : numpy_array
+        (num_cell, filt_n, filt_m) fixed weights, None if rand_weight.
+
+    root : np.random.SeedSequence
+        Root of the stream of every part, see _part_rng.
+
+    params : dict
+        Arguments of _reconstruct_part shared by every part.
+    '''
+    filt_n, filt_m = filter_dim
+    # Computes num_cell if the num_cell is in between 0~1.
+    # Get percentage of num_cell with its filter dim (num_cell * filt_n * filt_m)
+    if (num_cell < 1):
+        num_cell = int(round(num_cell * filt_n * filt_m))
+
+    #alpha parameter is dependent on the number of cell if alpha is not specified
+    if (alpha is None) :
+        alpha = 1 * 50 / num_cell
+    # A list of alpha reconstructs every alpha on the same observation
+    alpha_list = list(alpha) if np.ndim(alpha) > 0 else [alpha]
+
+    # Every part draws its observation from the same stream
+    rng = check_rng(rng)
+
+    if weight_bank is not None and observation.lower() != 'v1':
+        raise Exception("weight_bank only holds weights for V1 observation")
+
+    # If user wants to test the fixed weights. Default set to None
+    W = None
+    if rand_weight == False and weight_bank is not None:
+        W = bank_weights(weight_bank, num_cell, (filt_n, filt_m), cell_size,
+                         sparse_freq, bank_seed).astype(dtype, copy = False)
+    elif rand_weight == False:
+        # Store generated V1 cells in W
+        W = V1_weights(num_cell, (filt_n, filt_m), cell_size, sparse_freq,
+                       rng = rng)
+        W = W.reshape(num_cell, filt_n, filt_m).astype(dtype, copy = False)
+
+    # Each part draws from its own stream, so that the result does not
+    # depend on the order in which the parts are reconstructed
+    root = np.random.SeedSequence(int(rng.integers(2 ** 63)))
+    params = dict(num_cell = num_cell, cell_size = cell_size,
+                  sparse_freq = sparse_freq, alpha_list = alpha_list,
+                  method = method, observation = observation, lv = lv,
+                  dwt_type = dwt_type, rand_weight = rand_weight,
+                  color = color, solver = solver, dtype = dtype,
+                  screen = screen, tol = tol, max_iter = max_iter,
+                  weight_bank = weight_bank, bank_seed = bank_seed,
+                  chunk_size = chunk_size)
+    return W, root, params
+
+def _part_executor(workers, W):
+    '''
+    Process pool of workers processes (-1 for one per core) for the parts,
+    with the BLAS threads of each limited to cpu_count // workers and the
+    fixed weights W sent once to each (see _init_worker).
+    None if workers is None or 1.
+    '''
+    if workers is None or workers == 1:
+        return None
+    workers = os.cpu_count() if workers == -1 else workers
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    return ProcessPoolExecutor(max_workers = workers,
+                               initializer = _init_worker,
+                               initargs = (threads, W))
 
 def large_img_experiment(img_arr, num_cell, cell_size = None,
                          sparse_freq = None, filter_dim = (30, 30),
                          alpha = None, method = 'dct', observation = 'pixel',
                          lv = 2, dwt_type = 'db2', rand_weight = True,
-                         color = False) :
+                         color = False, solver = 'lasso',
+                         dtype = np.float64, screen = False, tol = 1e-4,
+                         max_iter = 1000, return_info = False,
+                         weight_bank = None, bank_seed = 0, rng = None,
+                         chunk_size = None, workers = None,
+                         executor = None, batch = False) :
     ''' 
     Allows to reconstruct any size of signal data since regular reconstruct 
     function can only deal with small size of data. 
@@ -551,14 +2424,18 @@ def large_img_experiment(img_arr, num_cell, cell_size = None,
     filter_dim : tuple
         Determines area of data that are going to be reconstructed, until
         all image is reconstructed. Zero padding technique used.
+        Pass the image dimension to reconstruct it in one piece, which is
+        only feasible with solver = 'fista'.
         Default set to (30, 30)
     
-    alpha : float
+    alpha : float or List of float
         Penalty for fitting data onto LASSO function to search 
         for significant coefficents. 
         Default set to None, and if the parameter is None, it computes 
         alpha value that would fit to the data reconstruction depending on
-        its size.
+        its size. If a list is given, each part is solved for every alpha
+        on the same observation with warm starts (see reconstruct_path)
+        and a list of images is returned.
     
     fit_intercept : bool
         Parameter for LASSO function. Automatically adjust intercept 
@@ -573,10 +2450,12 @@ def large_img_experiment(img_arr, num_cell, cell_size = None,
         Observation technique that are going to be used to collet sample 
         for reconstruction. 
         Default set up to 'pixel'.
-        Supported observation : ['pixel', 'gaussian', 'V1']
+        Supported observation : ['pixel', 'gaussian', 'srht', 'V1']
             pixel: Select num_cell amount of random data point throughout data
             gaussian: Give weights to individual data, and select num_cell 
                       amount of random data point throughout data
+            srht: Flip the sign of each data point at random and select 
+                  num_cell random dct coefficients of the result
             V1: Select random data that are observed by the num_cell amount of 
                 neurocomputation model of visual cortex cells
     
@@ -599,46 +2478,109 @@ def large_img_experiment(img_arr, num_cell, cell_size = None,
         Indicates if the image working on is color image or black/white image.
         Default set to be False.
         Possible colors are [True, False].
+
+    solver : String
+        Solver used for the reconstruction of each part, see reconstruct.
+        Default set to 'lasso'.
+
+    dtype : data-type
+        Floating point type of the observations and the reconstruction.
+        np.float32 halves the memory and bandwidth of W and theta.
+        Default set to np.float64.
+
+    screen : bool
+        Use gap safe screening for each part, see reconstruct.
+        Default set to False.
+
+    tol : float
+        Relative duality gap target of each part, see reconstruct.
+        Default set to 1e-4.
+
+    max_iter : int
+        Maximum number of solver iterations of each part.
+        Default set to 1000.
+
+    return_info : bool
+        Also return the diagnostics record of the reconstruction, which
+        combines those of every part (see merge_diagnostics).
+        Default set to False.
+
+    weight_bank : String
+        Directory of a V1 weight bank (see weight_bank.py). If given, the V1
+        weights of each part are zero-copy slices of the pool keyed by
+        (filter_dim, cell_size, sparse_freq, bank_seed) instead of newly
+        sampled ones. Only for V1 observation.
+        Default set to None.
+
+    bank_seed : int
+        Seed of the pool served from the weight bank. Default set to 0.
+
+    rng : np.random.Generator
+        Generator to draw the observations from, see check_rng. Each part
+        draws from its own stream derived from rng (see _part_rng), so the
+        result does not depend on workers. Default set to None, seeded from
+        the global numpy random state.
+
+    chunk_size : int
+        Generate the observation of each part in chunks of rows, see
+        generate_observations. Useful when num_cell gets close to the
+        number of pixels of a part. Default set to None, all at once.
+
+    workers : int
+        Reconstruct the parts in a pool of this many processes, -1 for one
+        per core. The BLAS threads of each worker are limited to
+        cpu_count // workers. Default set to None, one part after another.
+
+    executor : concurrent.futures.Executor
+        Executor to reconstruct the parts with instead, e.g. a shared
+        ProcessPoolExecutor or a dask client's get_executor(). It must be
+        able to pickle the parts, and BLAS threads are left to the caller.
+        Fixed weights sampled here (rand_weight = False without a 
+        weight_bank) are sent with every part, while workers sends them
+        once to each worker. Default set to None.
+
+    batch : bool
+        Solve every part at once when they share the same W 
+        (rand_weight = False): theta is built once and each part is a 
+        column of one multi-target problem (see reconstruct_path), so the 
+        reconstruction is a few large products with theta instead of one
+        small solve per part. Best with solver = 'fista' or 'admm', which
+        iterate on all columns together. Runs in the calling process, 
+        workers and executor are ignored. Default set to False.
     
     Returns
     ----------
     img : numpy_array
         (n * m) shaped or (n * m * d) array containing reconstructed 
         grayscale/RGB image array pixels.
+        List of such arrays, one per alpha, if alpha is a list.
+
+    record : dict
+        Only returned if return_info is True. Diagnostics record, see
+        merge_diagnostics. List of such dicts, one per alpha, if alpha is a
+        list.
     '''
                        
-    # Create Filter with size of filter_dim
-    filt = np.zeros(filter_dim)
     filt_n, filt_m = filter_dim
     
-    # Computes num_cell if the num_cell is in between 0~1.
-    # Get percentage of num_cell with its filter dim (num_cell * filt_n * filt_m)
-    if (num_cell < 1):
-        num_cell = int(round(num_cell * filt_n * filt_m))
-    
     # Edge handling case when user wants black/white reconstruction, but passed
     # in image array has rgb channel. Grayscale the image if so.
     if (not color and len(img_arr.shape) == 3):
         img_arr = np.asarray(ImageOps.grayscale(Image.fromarray(img_arr)))
-        
-    #alpha parameter is dependent on the number of cell if alpha is not specified
-    if (alpha == None) :
-        alpha = 1 * 50 / num_cell
+
+    # A list of alpha reconstructs every alpha on the same observation
+    path = np.ndim(alpha) > 0
+    W, root, params = _setup_parts(num_cell, cell_size, sparse_freq,
+                                   filter_dim, alpha, method, observation, lv,
+                                   dwt_type, rand_weight, color, solver, dtype,
+                                   screen, tol, max_iter, weight_bank,
+                                   bank_seed, rng, chunk_size)
     
     # Retrieve image dimension
     if color :
         n, m, d = img_arr.shape
     else:
         n, m = dim = img_arr.shape
-
-    # If user wants to test the fixed weights. Default set to None
-    W = None
-    if rand_weight == False:
-        dim = (filt_n, filt_m)
-        # Store generated V1 cells in W
-        W = V1_weights(num_cell, dim, cell_size, sparse_freq)
-        W = W.reshape(num_cell, filt_n, filt_m)
-
     
     # Compute the size of the dimension once zero padding is applied
     padding_n = compute_zero_padding_dimension(n, filt_n)
@@ -646,84 +2588,234 @@ def large_img_experiment(img_arr, num_cell, cell_size = None,
     
     # Process image with adding zero paddings
     if color :
-        img_arr_padded = np.zeros((padding_n, padding_m, d))
+        img_arr_padded = np.zeros((padding_n, padding_m, d), dtype = dtype)
         img_arr_padded[:n, :m, :] = img_arr
     else:
-        img_arr_padded = np.zeros((padding_n, padding_m))
+        img_arr_padded = np.zeros((padding_n, padding_m), dtype = dtype)
         img_arr_padded[:n, :m] = img_arr
     
-    i = 1 # counter
-    # Array that saves each part of completed reconstruced array
-    result = np.zeros(img_arr.shape) 
-    cur_n, cur_m = (0, 0)
+    # Array that saves each part of completed reconstruced array per alpha
+    result = np.zeros((len(params['alpha_list']),) + img_arr_padded.shape,
+                      dtype = dtype)
     # Computes number of reconstruction batches to be done 
     # base on filter dimension 
     num_work = (padding_n * padding_m) // (filt_n * filt_m)
-    
-    
-    # TODO: Add RandWeight functionality 
-    
-    
-    
-    # For each batch of data, run reconstruction 
-    for pt in range(num_work):
-        # Keep track over height of the batches. If working column
-        # (cur_m) exceeds/equals padded column, reset the cur_m and 
-        # update row (cur_n) 
-        if (cur_m >= padding_m) :
-            cur_n += filt_n
-            cur_m = 0
-        
-        # Compute the end of column for each batch, which is also
-        # going to be the start point of next batch
-        nxt_m = cur_m + filt_m
-        
-        # Reconstruct all 3 rgb channels if color
-        if color :
-            # Retrieve batch
-            img_arr_pt = img_arr_padded[cur_n : (cur_n + filt_n), cur_m : nxt_m, :]
-            
-            reconst = color_experiment(
-                img_arr_pt,  
-                num_cell, 
-                cell_size, 
-                sparse_freq, 
-                alpha = alpha, 
-                method = method, 
-                observation = observation,
-                lv = lv, 
-                dwt_type = dwt_type,
-                W = W)
-            img_arr_padded[cur_n : (cur_n + filt_n), cur_m : nxt_m, :] = reconst
-        else:    
-            img_arr_pt = img_arr_padded[cur_n : (cur_n + filt_n), cur_m : nxt_m]
-            
-            # if rand_weight == True, there is pre-set weight, so just compute y
-            if rand_weight : 
-                y = generate_Y(W, img_arr)
-            
-            # else, all W is randomized for each batch of reconstruction
-            else :
-                W, y = generate_observations(img_arr_pt, num_cell, observation,
-                                         cell_size, sparse_freq)
-                
-            W_model = W.reshape(num_cell, filt_n, filt_m)    
-
-            if (method == 'dct'):
-                reconst = reconstruct(W, y, alpha, method = method)
-            else :
-                reconst = reconstruct(W, y, alpha, method = method, lv = lv,
-                                      dwt_type = dwt_type)
-            img_arr_padded[cur_n : (cur_n + filt_n), cur_m : nxt_m] = reconst
-        cur_m = nxt_m
-
-        i+=1
-    result = img_arr_padded[:n, :m, :d] \
-        if color else img_arr_padded[:n,:m]
+    # Top left corner of each batch, row by row
+    corners = [(cur_n, cur_m) for cur_n in range(0, padding_n, filt_n)
+               for cur_m in range(0, padding_m, filt_m)]
+
+    if batch and W is None:
+        raise Exception("batch needs the same W for every part,"
+                        " use rand_weight = False")
+
+    # Weights from the bank are served to each part from the bank itself
+    W_part = W if weight_bank is None else None
+    own_executor = None
+    if batch:
+        executor = workers = None
+    if executor is None:
+        executor = own_executor = _part_executor(workers, W_part)
+    if own_executor is not None:
+        W_part = None
+
+    # Arguments of _reconstruct_part for each batch, the stream of a part
+    # is only derived once it is submitted
+    parts = ((img_arr_padded[cur_n : cur_n + filt_n, cur_m : cur_m + filt_m],
+              W_part, _part_rng(root, pt), pt, params)
+             for pt, (cur_n, cur_m) in enumerate(corners))
+    # Info of every part, in batch order, per alpha
+    part_info = [None] * num_work
+    try:
+        if batch:
+            batch_reconst, batch_info = _reconstruct_batch(
+                np.stack([img_arr_padded[cur_n : cur_n + filt_n,
+                                         cur_m : cur_m + filt_m]
+                          for cur_n, cur_m in corners]), W, params)
+            done = ((pt, (batch_reconst[:, pt], batch_info))
+                    for pt in range(num_work))
+        elif executor is None:
+            done = ((pt, _reconstruct_part(*args))
+                    for pt, args in enumerate(parts))
+        else:
+            futures = {executor.submit(_reconstruct_part, *args) : pt
+                       for pt, args in enumerate(parts)}
+            done = ((futures[future], future.result())
+                    for future in as_completed(futures))
+        # Write each part back into the padded result as it completes
+        for pt, (reconst, info_list) in done:
+            cur_n, cur_m = corners[pt]
+            result[:, cur_n : cur_n + filt_n, cur_m : cur_m + filt_m] = reconst
+            part_info[pt] = info_list
+    finally:
+        if own_executor is not None:
+            own_executor.shutdown(cancel_futures = True)
+    part_info = [list(info_list) for info_list in zip(*part_info)]
+    if batch:
+        # one solve covers every part
+        part_info = [[info] for info in batch_info]
+
+    result = result[:, :n, :m, :d] \
+        if color else result[:, :n,:m]
 
     # Fix any over/underestimated pixel between 0~255
     result[result < 0] = 0
     result[result > 255] = 255
     img = np.round(result).astype(int)
     
+    if return_info:
+        record = [merge_diagnostics(info_list) for info_list in part_info]
+        return (list(img), record) if path else (img[0], record[0])
+    return list(img) if path else img[0]
+
+
+def tiled_experiment(img_arr, out_path, num_cell, cell_size = None,
+                     sparse_freq = None, filter_dim = (30, 30),
+                     alpha = None, method = 'dct', observation = 'pixel',
+                     lv = 2, dwt_type = 'db2', rand_weight = True,
+                     color = False, solver = 'lasso',
+                     dtype = np.float64, screen = False, tol = 1e-4,
+                     max_iter = 1000, return_info = False,
+                     weight_bank = None, bank_seed = 0, rng = None,
+                     chunk_size = None, workers = None, executor = None,
+                     max_pending = None) :
+    '''
+    Out-of-core large_img_experiment for images larger than memory. The 
+    image is read one part at a time from a memmap, only the parts on the
+    bottom and right edges are zero padded, and each reconstructed part is
+    written to a .npy memmap at out_path. Peak memory is a few parts (at
+    most max_pending in flight) whatever the image size.
+    With the same rng, the result is the same as large_img_experiment.
+
+    Compressed scans (tiff, svs, png, ...) are converted to raw pixels 
+    first by a tool that decodes them in tiles, e.g. libvips:
+        vips colourspace scan.tif scan.v b-w
+        vips rawsave scan.v scan.raw
+    (drop the colourspace step to keep the rgb channels), then passed as
+    np.memmap('scan.raw', np.uint8, 'r', shape = (n, m)) with n, m (and
+    the number of channels) from vipsheader.
+
+    Parameters
+    ----------
+    img_arr : String or numpy_array
+        Path of a (n, m) or (n, m, d) .npy file of the image, opened as a
+        read-only memmap, or such an array (e.g. a np.memmap of a raw
+        file).
+
+    out_path : String
+        Path of the .npy file the reconstructed image is written to.
+
+    num_cell, cell_size, sparse_freq, filter_dim, method, observation, lv,
+    dwt_type, rand_weight, color, solver, dtype, screen, tol, max_iter,
+    weight_bank, bank_seed, rng, chunk_size, workers, executor
+        See large_img_experiment.
+
+    alpha : float
+        Penalty of the LASSO problem of every part. Unlike 
+        large_img_experiment, a list of alphas is not supported.
+        Default set to None, computed from num_cell.
+
+    return_info : bool
+        Also return the diagnostics record of the reconstruction, merged
+        over the parts as they complete (see merge_diagnostics).
+        Default set to False.
+
+    max_pending : int
+        Number of parts submitted to the executor and not yet written.
+        Default set to None, twice the number of workers.
+
+    Returns
+    ----------
+    img : numpy memmap
+        (n, m) or (n, m, d) shape uint8 array of the reconstructed image,
+        backed by out_path.
+
+    record : dict
+        Only returned if return_info is True. Diagnostics record, see
+        merge_diagnostics.
+    '''
+    if isinstance(img_arr, str):
+        img_arr = np.load(img_arr, mmap_mode = 'r')
+    if np.ndim(alpha) > 0:
+        raise Exception("tiled_experiment solves a single alpha")
+
+    filt_n, filt_m = filter_dim
+    W, root, params = _setup_parts(num_cell, cell_size, sparse_freq,
+                                   filter_dim, alpha, method, observation, lv,
+                                   dwt_type, rand_weight, color, solver, dtype,
+                                   screen, tol, max_iter, weight_bank,
+                                   bank_seed, rng, chunk_size)
+
+    # Edge handling case when user wants black/white reconstruction, but 
+    # the image has rgb channel. Each part is grayscaled when read.
+    gray = not color and img_arr.ndim == 3
+    n, m = img_arr.shape[:2]
+    shape = img_arr.shape if color else (n, m)
+
+    # Top left corner of each part, row by row, same order as 
+    # large_img_experiment
+    corners = ((cur_n, cur_m) 
+               for cur_n in range(0, compute_zero_padding_dimension(n, filt_n),
+                                  filt_n)
+               for cur_m in range(0, compute_zero_padding_dimension(m, filt_m),
+                                  filt_m))
+
+    def read_part(cur_n, cur_m):
+        part = np.asarray(img_arr[cur_n : cur_n + filt_n, 
+                                  cur_m : cur_m + filt_m])
+        if gray:
+            part = np.asarray(ImageOps.grayscale(Image.fromarray(part)))
+        img_arr_pt = np.zeros((filt_n, filt_m) + shape[2:], dtype = dtype)
+        img_arr_pt[:part.shape[0], :part.shape[1]] = part
+        return img_arr_pt
+
+    img = open_memmap(out_path, mode = 'w+', dtype = np.uint8, shape = shape)
+    record = None
+
+    def write_part(cur_n, cur_m, reconst, info_list):
+        nonlocal record
+        # Fix any over/underestimated pixel between 0~255
+        reconst = np.round(np.clip(reconst[0], 0, 255)).astype(np.uint8)
+        part = img[cur_n : cur_n + filt_n, cur_m : cur_m + filt_m]
+        part[...] = reconst[:part.shape[0], :part.shape[1]]
+        record = merge_diagnostics([info_list[0]] if record is None
+                                   else [record, info_list[0]])
+        # Write back a row of parts at a time
+        if cur_m + filt_m >= m:
+            img.flush()
+
+    # Weights from the bank are served to each part from the bank itself
+    W_part = W if weight_bank is None else None
+    own_executor = None
+    if executor is None:
+        executor = own_executor = _part_executor(workers, W_part)
+    if own_executor is not None:
+        W_part = None
+    if max_pending is None:
+        max_pending = 2 * (workers if workers not in (None, -1)
+                           else os.cpu_count() or 1)
+
+    try:
+        pending = {}
+        for pt, (cur_n, cur_m) in enumerate(corners):
+            args = (read_part(cur_n, cur_m), W_part, _part_rng(root, pt), pt, 
+                    params)
+            if executor is None:
+                write_part(cur_n, cur_m, *_reconstruct_part(*args))
+                continue
+            pending[executor.submit(_reconstruct_part, *args)] = \
+                (cur_n, cur_m)
+            # Bound the parts held in memory
+            while len(pending) >= max_pending:
+                done, _ = wait(pending, return_when = FIRST_COMPLETED)
+                for future in done:
+                    write_part(*pending.pop(future), *future.result())
+        for future in as_completed(pending):
+            write_part(*pending[future], *future.result())
+    finally:
+        if own_executor is not None:
+            own_executor.shutdown(cancel_futures = True)
+    img.flush()
+    
+    if return_info:
+        return img, record
     return img
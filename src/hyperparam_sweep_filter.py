@@ -9,6 +9,7 @@ from PIL import Image, ImageOps
 from src.compress_sensing import *
 from src.utility import *
 from src.args import parse_sweep_args
+from src.weight_bank import build_weight_bank
 import pandas as pd
 import itertools
 import dask
@@ -22,7 +23,10 @@ import pywt
 
 
 def run_sweep(method, img, observation, mode, dwt_type, lv,
-              alpha_list, num_cell, cell_size, sparse_freq):
+              alpha_list, num_cell, cell_size, sparse_freq, path = False,
+              dtype = 'float64', solver = 'lasso',
+              tol = 1e-4, max_iter = 1000, weight_bank = None,
+              seed = None):
     ''' 
     Generate a sweep over desired hyperparameters and saves results to a file.
     
@@ -35,7 +39,7 @@ def run_sweep(method, img, observation, mode, dwt_type, lv,
         Name of image to reconstruct (e.g. 'tree_part1.jpg')
 
     observation : String
-        Method of observation (e.g. pixel, gaussian, v1)
+        Method of observation (e.g. pixel, gaussian, srht, v1)
     
     mode : String
         Desired mode to reconstruct image 
@@ -63,6 +67,39 @@ def run_sweep(method, img, observation, mode, dwt_type, lv,
     sparse_freq : List of int
         Determines filed frequency on how frequently 
         opened and closed area would appear. Affect the data training
+
+    path : bool
+        If True, each task solves every alpha in alpha_list on the same 
+        observation, from largest to smallest with warm starts, instead of
+        running one task per alpha. Output has the same csv schema.
+        Default set to False.
+
+    dtype : String
+        Floating point type used by the reconstruction 
+        ('float64' or 'float32'). Default set to 'float64'.
+
+    solver : String
+        Solver used by the reconstruction (see SOLVERS in compress_sensing).
+        Default set to 'lasso'.
+
+    tol : float
+        Relative duality gap target of the solver. Default set to 1e-4.
+
+    max_iter : int
+        Maximum number of solver iterations. Default set to 1000.
+
+    weight_bank : String
+        Directory of a V1 weight bank (see weight_bank.py). Missing pools are
+        sampled once here, one per (cell_size, sparse_freq, rep), and every
+        task serves its V1 weights from them read-only.
+        Default set to None, tasks sample their own weights.
+
+    seed : int
+        Entropy of the np.random.SeedSequence the per task streams are 
+        spawned from. The seed of every task is saved in the 'seed' column,
+        so any row can be replayed by passing it to the run_sim function.
+        Default set to None, fresh entropy that is saved with the 
+        hyperparameters.
     '''
 
 
@@ -81,17 +118,19 @@ def run_sweep(method, img, observation, mode, dwt_type, lv,
             search = list(itertools.product(*search_list))
             search_df = pd.DataFrame(search, columns= [ 'rep', 'alp',
                                                         'num_cell'])
-            sim_wrapper = lambda rep, alp, num_cell: \
+            sim_wrapper = lambda rep, alp, num_cell, seed: \
                 run_sim_dct(method, observation, mode,
-                            alp, num_cell, img_arr)
+                            alp, num_cell, img_arr, dtype, solver, tol,
+                            max_iter, seed)
         elif method.lower() == 'dwt':
             search_list = [rep, dwt_type, lv, alpha_list, num_cell]
             search = list(itertools.product(*search_list))             
             search_df = pd.DataFrame(search, columns= [ 'rep', 'dwt_type', 'lv',
                                                         'alp', 'num_cell'])
-            sim_wrapper = lambda rep, dwt_type, lv, alp, num_cell: \
+            sim_wrapper = lambda rep, dwt_type, lv, alp, num_cell, seed: \
                 run_sim_dwt(method, observation, mode, dwt_type,
-                            lv, alp, num_cell, img_arr)
+                            lv, alp, num_cell, img_arr, dtype, solver, tol,
+                            max_iter, seed)
     # give v1 param search space
     elif observation.upper() == 'V1':
         # specify search space for dct and dwt params
@@ -101,9 +140,11 @@ def run_sweep(method, img, observation, mode, dwt_type, lv,
             search_df = pd.DataFrame(search,
                                      columns= ['rep', 'alp', 'num_cell',
                                                'cell_size', 'sparse_freq'])
-            sim_wrapper = lambda rep, alp, num_cell, cell_size, sparse_freq: \
-                run_sim_V1_dct(method, observation, mode, alp,
-                               num_cell, cell_size, sparse_freq, img_arr)
+            sim_wrapper = lambda rep, alp, num_cell, cell_size, sparse_freq, \
+                seed: run_sim_V1_dct(method, observation, mode, alp,
+                                     num_cell, cell_size, sparse_freq, img_arr,
+                                     dtype, solver, tol, max_iter, weight_bank,
+                                     rep, seed)
         elif method.lower() == 'dwt':
             search_list = [rep, dwt_type, lv, alpha_list, num_cell, cell_size, sparse_freq]
             search = list(itertools.product(*search_list))             
@@ -112,28 +153,67 @@ def run_sweep(method, img, observation, mode, dwt_type, lv,
                                                         'cell_size', 'sparse_freq'
                                                        ])
             sim_wrapper = lambda rep, dwt_type, lv, alp, num_cell, cell_size, \
-                sparse_freq: run_sim_V1_dwt(method, observation, mode,
-                                            dwt_type, lv, alp, num_cell,
-                                            cell_size, sparse_freq, img_arr)
+                sparse_freq, seed: run_sim_V1_dwt(method, observation, mode,
+                                                  dwt_type, lv, alp, num_cell,
+                                                  cell_size, sparse_freq,
+                                                  img_arr, dtype, solver, tol,
+                                                  max_iter, weight_bank, rep,
+                                                  seed)
+        # Sample the V1 weight pools once, tasks only read them. Every 
+        # 30x30 part of the image is served its own block of weights
+        if weight_bank is not None:
+            n, m = img_arr.shape[:2]
+            max_cell = max(int(round(n * m * c)) if c < 1 else int(c)
+                           for c in num_cell)
+            num_parts = (compute_zero_padding_dimension(n, 30) // 30) \
+                * (compute_zero_padding_dimension(m, 30) // 30)
+            for cs, sf, r in itertools.product(cell_size, sparse_freq, rep):
+                build_weight_bank(weight_bank, (30, 30), cs, sf, r,
+                                  pool_size = num_parts * max_cell)
     else: 
          print(f"The observation {observation} is currently not supported.")
          print(" Please try valid observation type.")
 
-    for p in search_df.values:
-        delay = dask.delayed(sim_wrapper)(*p)
+    # In path mode, one task covers every alpha of its other parameters
+    alp_idx = list(search_df.columns).index('alp')
+    task_df = search_df.drop(columns = 'alp').drop_duplicates() \
+        if path else search_df
+
+    # Every task draws its observation from its own stream of one 
+    # SeedSequence, so tasks can run anywhere and still be replayed
+    seed_seq = np.random.SeedSequence(seed)
+    task_seed = [int(child.generate_state(1, np.uint64)[0])
+                 for child in seed_seq.spawn(len(task_df))]
+    for p, p_seed in zip(task_df.values, task_seed):
+        if path:
+            p = np.insert(p.astype(object), alp_idx, None)
+            p[alp_idx] = alpha_list
+        delay = dask.delayed(sim_wrapper)(*p, p_seed)
         delay_list.append(delay)
     futures = dask.persist(*delay_list)
     progress(futures)
     # Compute the result
     results = dask.compute(*futures)
+
+    # Spread the results of each path back to one row per alpha
+    if path:
+        path_result = {tuple(p) : dict(zip(alpha_list, result))
+                       for p, result in zip(task_df.values.tolist(), results)}
+        path_seed = dict(zip(map(tuple, task_df.values.tolist()), task_seed))
+        rows = search_df.drop(columns = 'alp').values.tolist()
+        results = [path_result[tuple(p)][alp]
+                   for p, alp in zip(rows, search_df['alp'])]
+        task_seed = [path_seed[tuple(p)] for p in rows]
+    search_df['seed'] = task_seed
     
-    # Saves Computed data to csv file format
-    results_df = pd.DataFrame(results, columns=['error'])#, 'theta', 'reform', 's'])
+    # Saves Computed data to csv file format, the error followed by the
+    # diagnostics of the reconstruction (iterations, convergence, gap, ...)
+    results_df = pd.DataFrame(list(results))
     param_csv_nm = "param_"
     param_path = data_save_path(image_nm, method, observation,
                                 f'{mode}_{param_csv_nm}')
-    # Add error onto parameter
-    params_result_df = search_df.join(results_df['error'])
+    # Add error and diagnostics onto parameter
+    params_result_df = search_df.join(results_df)
     params_result_df.to_csv(param_path, index=False)
     
     # Saves hyperparameter used for computing this data to txt file format
@@ -144,15 +224,48 @@ def run_sweep(method, img, observation, mode, dwt_type, lv,
     f.write(f"{param_path.split('/')[-1]}\n")
     for hyperparam in hyperparam_list :
         f.write(f"   {hyperparam[0]}: {hyperparam[1]}\n")
+    f.write(f"   dtype: {dtype}\n")
+    f.write(f"   solver: {solver}\n")
+    f.write(f"   tol: {tol}\n")
+    f.write(f"   max_iter: {max_iter}\n")
+    f.write(f"   weight_bank: {weight_bank}\n")
+    f.write(f"   seed: {seed_seq.entropy}\n")
     f.write("\n\n")
     f.close()
     
     # Terminate Dask properly
     client.close()
 
+def sim_result(img_arr, reconst, record):
+    ''' 
+    Pair the error of each reconstruction with its diagnostics record.
+    
+    Parameters
+    ----------
+    img_arr : numpy_array
+        (n, m) shape image containing array of pixels
+
+    reconst : numpy_array or List of numpy_array
+        Reconstructed image, one per alpha in path mode
+
+    record : dict or List of dict
+        Diagnostics record of each reconstruction
+
+    Returns
+    ----------
+    result : dict or List of dict
+        record with the error added under 'error'
+    '''
+    if isinstance(reconst, list):
+        return [dict(error = error_calculation(img_arr, reconst_alp), **rec)
+                for reconst_alp, rec in zip(reconst, record)]
+    return dict(error = error_calculation(img_arr, reconst), **record)
+
 # run sim for non-v1 dwt
 def run_sim_dwt(method, observation, mode, dwt_type,
-                lv, alpha, num_cell, img_arr):
+                lv, alpha, num_cell, img_arr, dtype = 'float64',
+                solver = 'lasso',
+                tol = 1e-4, max_iter = 1000, seed = None):
     ''' 
     Run a sim for non-v1 dwt
     
@@ -175,9 +288,10 @@ def run_sim_dwt(method, observation, mode, dwt_type,
         Generate level of signal frequencies when dwt is used. 
         Should be in [1, 4].
 
-    alpha : float
+    alpha : float or List of float
         Penalty for fitting data onto LASSO function 
-        to search for significant coefficents
+        to search for significant coefficents.
+        A list solves every alpha on the same observation.
 
     num_cell : int
         Number of blobs that will be used to be 
@@ -185,11 +299,30 @@ def run_sim_dwt(method, observation, mode, dwt_type,
 
     img_arr : numpy_array
         (n, m) shape image containing array of pixels
+
+    dtype : String
+        Floating point type used by the reconstruction.
+        Default set to 'float64'.
+
+    solver : String
+        Solver used by the reconstruction. Default set to 'lasso'.
+
+    tol : float
+        Relative duality gap target of the solver. Default set to 1e-4.
+
+    max_iter : int
+        Maximum number of solver iterations. Default set to 1000.
+
+    seed : int
+        Seed of the stream the observations are drawn from, see the 'seed' 
+        column of the sweep csv. Default set to None, fresh entropy.
     
     Returns
     ----------
-    error : float
-        Computed normalized error value per each pixel
+    result : dict or List of dict
+        Computed normalized error value per each pixel ('error') along with
+        the diagnostics record of the reconstruction (see merge_diagnostics),
+        one per alpha if alpha is a list
     '''
     dim = img_arr.shape
     if (len(dim) == 3) :
@@ -201,21 +334,26 @@ def run_sim_dwt(method, observation, mode, dwt_type,
         num_cell = round(n * m * num_cell)
     num_cell = int(num_cell)
     lv = int(lv)
-    alpha = float(alpha)
+    alpha = [float(alp) for alp in alpha] if np.ndim(alpha) > 0 \
+        else float(alpha)
     img_arr = np.array([img_arr]).squeeze()
-    reconst = large_img_experiment(img_arr, num_cell = num_cell, alpha = alpha,
-                                   method = method, observation = observation,
-                                   mode = mode, lv = lv, dwt_type = dwt_type)
+    rng = np.random.default_rng(seed)
+    reconst, record = large_img_experiment(
+        img_arr, num_cell = num_cell, alpha = alpha, method = method,
+        observation = observation, color = mode, lv = lv, dwt_type = dwt_type,
+        dtype = dtype, solver = solver, tol = tol, max_iter = max_iter,
+        return_info = True, rng = rng)
 
     # Call function and calculate error
-    error = error_calculation(img_arr, reconst)
-    
-    return error
+    return sim_result(img_arr, reconst, record)
 
 
 # run sim for v1 dwt
 def run_sim_V1_dwt(method, observation, mode, dwt_type,
-                   lv, alpha, num_cell, cell_size, sparse_freq, img_arr):
+                   lv, alpha, num_cell, cell_size, sparse_freq, img_arr,
+                   dtype = 'float64', solver = 'lasso',
+                   tol = 1e-4, max_iter = 1000, weight_bank = None,
+                   bank_seed = 0, seed = None):
     ''' 
     Run a sim for v1 dwt
     
@@ -238,9 +376,10 @@ def run_sim_V1_dwt(method, observation, mode, dwt_type,
         Generate level of signal frequencies when dwt is used. 
         Should be in [1, 4].
 
-    alpha : float
+    alpha : float or List of float
         Penalty for fitting data onto LASSO function to 
-        search for significant coefficents
+        search for significant coefficents.
+        A list solves every alpha on the same observation.
 
     num_cell : int
         Number of blobs that will be used to 
@@ -256,11 +395,37 @@ def run_sim_V1_dwt(method, observation, mode, dwt_type,
 
     img_arr : numpy_array
         (n, m) shape image containing array of pixels
+
+    dtype : String
+        Floating point type used by the reconstruction.
+        Default set to 'float64'.
+
+    solver : String
+        Solver used by the reconstruction. Default set to 'lasso'.
+
+    tol : float
+        Relative duality gap target of the solver. Default set to 1e-4.
+
+    max_iter : int
+        Maximum number of solver iterations. Default set to 1000.
+
+    weight_bank : String
+        Directory of the V1 weight bank serving the weights.
+        Default set to None, weights are sampled for this sim.
+
+    bank_seed : int
+        Seed of the pool served from the weight bank. Default set to 0.
+
+    seed : int
+        Seed of the stream the observations are drawn from, see the 'seed' 
+        column of the sweep csv. Default set to None, fresh entropy.
         
     Returns
     ----------
-    error : float
-        Computed normalized error value per each pixel
+    result : dict or List of dict
+        Computed normalized error value per each pixel ('error') along with
+        the diagnostics record of the reconstruction (see merge_diagnostics),
+        one per alpha if alpha is a list
     '''
     dim = img_arr.shape
     if (len(dim) == 3) :
@@ -272,24 +437,28 @@ def run_sim_V1_dwt(method, observation, mode, dwt_type,
         num_cell = round(n * m * num_cell)
     num_cell = int(num_cell)
     lv = int(lv)
-    alpha = float(alpha)
+    alpha = [float(alp) for alp in alpha] if np.ndim(alpha) > 0 \
+        else float(alpha)
     
     img_arr = np.array([img_arr]).squeeze()
+    rng = np.random.default_rng(seed)
     #Filter reconst to make sure it can reconstruct any size 
-    reconst = large_img_experiment(img_arr, num_cell = num_cell,
-                                   cell_size = cell_size, sparse_freq = sparse_freq,
-                                   alpha = alpha, method = method,
-                                   observation = observation, mode = mode,
-                                   lv = lv, dwt_type = dwt_type)
+    reconst, record = large_img_experiment(
+        img_arr, num_cell = num_cell, cell_size = cell_size,
+        sparse_freq = sparse_freq, alpha = alpha, method = method,
+        observation = observation, color = mode, lv = lv, dwt_type = dwt_type,
+        dtype = dtype, solver = solver, tol = tol, max_iter = max_iter,
+        return_info = True, weight_bank = weight_bank, bank_seed = bank_seed,
+        rng = rng)
     
     # Calculates for the error per pixel
-    error = error_calculation(img_arr, reconst)
-    
-    return error
+    return sim_result(img_arr, reconst, record)
 
     
 # run sim for non-v1 dct 
-def run_sim_dct(method, observation, mode, alpha, num_cell, img_arr):
+def run_sim_dct(method, observation, mode, alpha, num_cell, img_arr,
+                dtype = 'float64', solver = 'lasso',
+                tol = 1e-4, max_iter = 1000, seed = None):
     ''' 
     Run a sim for non-v1 dct
     
@@ -305,9 +474,10 @@ def run_sim_dct(method, observation, mode, alpha, num_cell, img_arr):
     mode : String
         Desired mode to reconstruct image (e.g. 'Color' or 'Black').
 
-    alpha : float
+    alpha : float or List of float
         Penalty for fitting data onto LASSO function to 
-        search for significant coefficents
+        search for significant coefficents.
+        A list solves every alpha on the same observation.
 
     num_cell : List of int
         Number of blobs that will be used to be 
@@ -316,10 +486,29 @@ def run_sim_dct(method, observation, mode, alpha, num_cell, img_arr):
     img_arr : numpy_array
         (n, m) shape image containing array of pixels
 
+    dtype : String
+        Floating point type used by the reconstruction.
+        Default set to 'float64'.
+
+    solver : String
+        Solver used by the reconstruction. Default set to 'lasso'.
+
+    tol : float
+        Relative duality gap target of the solver. Default set to 1e-4.
+
+    max_iter : int
+        Maximum number of solver iterations. Default set to 1000.
+
+    seed : int
+        Seed of the stream the observations are drawn from, see the 'seed' 
+        column of the sweep csv. Default set to None, fresh entropy.
+
     Returns
     ----------
-    error : float
-        Computed normalized error value per each pixel
+    result : dict or List of dict
+        Computed normalized error value per each pixel ('error') along with
+        the diagnostics record of the reconstruction (see merge_diagnostics),
+        one per alpha if alpha is a list
     '''
     dim = img_arr.shape
     if (len(dim) == 3) :
@@ -330,18 +519,25 @@ def run_sim_dct(method, observation, mode, alpha, num_cell, img_arr):
     if (num_cell < 1):
         num_cell = round(n * m * num_cell)
     num_cell = int(num_cell)
+    alpha = [float(alp) for alp in alpha] if np.ndim(alpha) > 0 \
+        else float(alpha)
     img_arr = np.array([img_arr]).squeeze()
-    reconst = large_img_experiment(img_arr, num_cell = num_cell, alpha = alpha,
-                                   method = method, observation = observation,
-                                   mode = mode)
+    rng = np.random.default_rng(seed)
+    reconst, record = large_img_experiment(
+        img_arr, num_cell = num_cell, alpha = alpha, method = method,
+        observation = observation, color = mode, dtype = dtype,
+        solver = solver, tol = tol, max_iter = max_iter, return_info = True,
+        rng = rng)
     
     # Call function and calculate error
-    error = error_calculation(img_arr, reconst)
-    return error
+    return sim_result(img_arr, reconst, record)
 
 # run sim for v1 dct
 def run_sim_V1_dct(method, observation, mode, alpha,
-                   num_cell, cell_size, sparse_freq, img_arr):
+                   num_cell, cell_size, sparse_freq, img_arr,
+                   dtype = 'float64', solver = 'lasso',
+                   tol = 1e-4, max_iter = 1000, weight_bank = None,
+                   bank_seed = 0, seed = None):
     ''' 
     Run a sim for V1 dct
     
@@ -356,9 +552,10 @@ def run_sim_V1_dct(method, observation, mode, alpha,
     mode : String
         Desired mode to reconstruct image (e.g. 'Color' or 'Black').
 
-    alpha : float
+    alpha : float or List of float
         Penalty for fitting data onto LASSO function to 
-        search for significant coefficents
+        search for significant coefficents.
+        A list solves every alpha on the same observation.
 
     num_cell : int
         Number of blobs that will be used to be 
@@ -375,10 +572,36 @@ def run_sim_V1_dct(method, observation, mode, alpha,
     img_arr : numpy_array
         (n, m) shape image containing array of pixels
 
+    dtype : String
+        Floating point type used by the reconstruction.
+        Default set to 'float64'.
+
+    solver : String
+        Solver used by the reconstruction. Default set to 'lasso'.
+
+    tol : float
+        Relative duality gap target of the solver. Default set to 1e-4.
+
+    max_iter : int
+        Maximum number of solver iterations. Default set to 1000.
+
+    weight_bank : String
+        Directory of the V1 weight bank serving the weights.
+        Default set to None, weights are sampled for this sim.
+
+    bank_seed : int
+        Seed of the pool served from the weight bank. Default set to 0.
+
+    seed : int
+        Seed of the stream the observations are drawn from, see the 'seed' 
+        column of the sweep csv. Default set to None, fresh entropy.
+
     Returns
     ----------
-    error : float
-        Computed normalized error value per each pixel
+    result : dict or List of dict
+        Computed normalized error value per each pixel ('error') along with
+        the diagnostics record of the reconstruction (see merge_diagnostics),
+        one per alpha if alpha is a list
     '''
     dim = img_arr.shape
     if (len(dim) == 3) :
@@ -389,21 +612,26 @@ def run_sim_V1_dct(method, observation, mode, alpha,
     if (num_cell < 1):
         num_cell = round(n * m * num_cell)
     num_cell = int(num_cell)
+    alpha = [float(alp) for alp in alpha] if np.ndim(alpha) > 0 \
+        else float(alpha)
     img_arr = np.array([img_arr]).squeeze()
-    reconst = large_img_experiment(img_arr, num_cell = num_cell,
-                                   cell_size=cell_size, sparse_freq=sparse_freq,
-                                   alpha = alpha, method = method,
-                                   observation = observation, mode = mode)
-    error = error_calculation(img_arr, reconst)
-    
-    return error
+    rng = np.random.default_rng(seed)
+    reconst, record = large_img_experiment(
+        img_arr, num_cell = num_cell, cell_size = cell_size,
+        sparse_freq = sparse_freq, alpha = alpha, method = method,
+        observation = observation, color = mode, dtype = dtype,
+        solver = solver, tol = tol, max_iter = max_iter, return_info = True,
+        weight_bank = weight_bank, bank_seed = bank_seed, rng = rng)
+    return sim_result(img_arr, reconst, record)
 
 
 def main():
     method, img, observation, mode, dwt_type, level, alpha_list, \
-        num_cell, cell_size, sparse_freq = parse_sweep_args()
+        num_cell, cell_size, sparse_freq, path, dtype, solver, tol, max_iter, \
+        weight_bank, seed = parse_sweep_args()
     run_sweep(method, img, observation, mode, dwt_type, level, alpha_list,
-              num_cell, cell_size, sparse_freq)
+              num_cell, cell_size, sparse_freq, path, dtype, solver, tol,
+              max_iter, weight_bank, seed)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,314 @@
+import numpy as np
+import os
+import sys
+import json
+import hashlib
+from numpy.lib.format import open_memmap
+from structured_random_features.src.models.weights import V1_weights
+from src.args import parse_bank_args
+
+# Memmaps already opened by this process, keyed by file path
+_open_banks = {}
+
+
+def bank_key(dim, cell_size, sparse_freq, seed):
+    '''
+    Normalized key of a pool of V1 weights in the bank.
+
+    Parameters
+    ----------
+    dim : tuple
+        (n, m) shape of each weight.
+
+    cell_size : int
+        Determines field size of opened and closed blob of data.
+
+    sparse_freq : int
+        Determines filed frequency on how frequently
+        opened and closed area would appear.
+
+    seed : int
+        Seed used to sample the pool.
+
+    Returns
+    ----------
+    key : tuple
+        (dim, cell_size, sparse_freq, seed) with plain python values
+    '''
+    return (tuple(int(d) for d in dim), float(cell_size), float(sparse_freq),
+            int(seed))
+
+def bank_path(bank_dir, dim, cell_size, sparse_freq, seed):
+    '''
+    Path of the .npy file holding the pool of V1 weights of a key.
+    The .json file next to it holds the metadata and checksum of the pool.
+
+    Parameters
+    ----------
+    bank_dir : String
+        Directory of the weight bank.
+
+    dim, cell_size, sparse_freq, seed
+        Key of the pool, see bank_key.
+
+    Returns
+    ----------
+    path : String
+        Path of the .npy file
+    '''
+    dim, cell_size, sparse_freq, seed = bank_key(dim, cell_size, sparse_freq,
+                                                 seed)
+    name = f'V1_{dim[0]}x{dim[1]}_size{cell_size:g}_freq{sparse_freq:g}' \
+        f'_seed{seed}.npy'
+    return os.path.join(bank_dir, name)
+
+def _checksum(W):
+    '''
+    Hash of the content of a pool, read in blocks of rows so that
+    large memmaps are not loaded at once.
+    '''
+    h = hashlib.blake2b(digest_size = 16)
+    step = max(1, 2 ** 24 // max(1, W[0].nbytes))
+    for start in range(0, len(W), step):
+        h.update(np.ascontiguousarray(W[start : start + step]).data)
+    return h.hexdigest()
+
+def build_weight_bank(bank_dir, dim, cell_size, sparse_freq, seed,
+                      pool_size = 10000, dtype = np.float64,
+                      chunk_size = 4096, max_bytes = None, keep = ()):
+    '''
+    Sample a pool of pool_size V1 weights for a key and store it in the bank
+    as a .npy file that can be memory mapped. The pool is sampled in chunks
+    of chunk_size weights, each seeded from (seed, chunk), and written to a
+    temporary file that is renamed once complete, so readers never see a
+    partial pool. An existing pool with at least pool_size weights is kept.
+
+    Parameters
+    ----------
+    bank_dir : String
+        Directory of the weight bank, created if missing.
+
+    dim, cell_size, sparse_freq, seed
+        Key of the pool, see bank_key.
+
+    pool_size : int
+        Number of weights in the pool. Default set to 10000.
+
+    dtype : data-type
+        Floating point type of the stored weights.
+        Default set to np.float64.
+
+    chunk_size : int
+        Number of weights sampled at once. Default set to 4096.
+
+    max_bytes : int
+        Size cap of the bank in bytes, see evict_weight_bank.
+        Default set to None, no cap.
+
+    keep : iterable of String
+        Paths that must not be evicted, the new pool is always kept.
+        Default set to ().
+
+    Returns
+    ----------
+    path : String
+        Path of the .npy file of the pool
+    '''
+    os.makedirs(bank_dir, exist_ok = True)
+    path = bank_path(bank_dir, dim, cell_size, sparse_freq, seed)
+    dim, cell_size, sparse_freq, seed = bank_key(dim, cell_size, sparse_freq,
+                                                 seed)
+    if os.path.exists(path) and len(load_weight_bank(path)) >= pool_size:
+        return path
+
+    n, m = dim
+    tmp_path = path[:-len('.npy')] + f'.{os.getpid()}.tmp.npy'
+    W = open_memmap(tmp_path, mode = 'w+', dtype = dtype,
+                    shape = (pool_size, n * m))
+    for k, start in enumerate(range(0, pool_size, chunk_size)):
+        num = min(chunk_size, pool_size - start)
+        W[start : start + num] = V1_weights(num, dim, cell_size, sparse_freq,
+                                            seed = [seed, k])
+    W.flush()
+    meta = dict(dim = list(dim), cell_size = cell_size,
+                sparse_freq = sparse_freq, seed = seed, pool_size = pool_size,
+                dtype = np.dtype(dtype).str, chunk_size = chunk_size,
+                checksum = _checksum(W))
+    del W
+    with open(path[:-len('.npy')] + '.json', 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, path)
+    _open_banks.pop(path, None)
+
+    if max_bytes is not None:
+        evict_weight_bank(bank_dir, max_bytes, keep = set(keep) | {path})
+    return path
+
+def load_weight_bank(path):
+    '''
+    Open a pool of the bank read-only as a memmap. Each process opens a
+    pool once, and the pages are shared by every process on the machine
+    through the page cache.
+
+    Parameters
+    ----------
+    path : String
+        Path of the .npy file of the pool, see bank_path.
+
+    Returns
+    ----------
+    W : numpy memmap
+        (pool_size, n*m) shape read-only array of V1 weights
+    '''
+    W = _open_banks.get(path)
+    if W is None:
+        if not os.path.exists(path):
+            raise Exception(f"{path} is not in the weight bank,"
+                            " build it with build_weight_bank first")
+        W = _open_banks[path] = np.load(path, mmap_mode = 'r')
+        # mark the pool as recently used for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+    return W
+
+def bank_weights(bank_dir, num_cell, dim, cell_size, sparse_freq, seed,
+                 part = 0):
+    '''
+    Serve num_cell V1 weights of a pool as a zero-copy slice of the memmap.
+    part selects consecutive blocks of num_cell rows, so that each part of
+    a tiled reconstruction sees its own weights. The pool must hold a block
+    for every part, pool_size >= number of parts * num_cell.
+
+    Parameters
+    ----------
+    bank_dir : String
+        Directory of the weight bank.
+
+    num_cell : int
+        Number of weights to serve.
+
+    dim, cell_size, sparse_freq, seed
+        Key of the pool, see bank_key.
+
+    part : int
+        Index of the block of num_cell rows. Default set to 0, the first
+        num_cell rows.
+
+    Returns
+    ----------
+    W : numpy memmap
+        (num_cell, n, m) shape read-only array of V1 weights
+    '''
+    W = load_weight_bank(bank_path(bank_dir, dim, cell_size, sparse_freq,
+                                   seed))
+    start = part * num_cell
+    if start + num_cell > len(W):
+        raise Exception(f"Weight bank pool has {len(W)} weights, part {part}"
+                        f" of {num_cell} weights needs {start + num_cell}."
+                        " Rebuild it with a larger pool_size")
+    return W[start : start + num_cell].reshape(num_cell, *dim)
+
+def verify_weight_bank(bank_dir):
+    '''
+    Check every pool of the bank against its metadata: shape, dtype and
+    checksum of the content.
+
+    Parameters
+    ----------
+    bank_dir : String
+        Directory of the weight bank.
+
+    Returns
+    ----------
+    bad : List of String
+        Paths of the pools that are missing metadata or do not match it
+    '''
+    bad = []
+    for name in sorted(os.listdir(bank_dir)):
+        if not name.endswith('.npy') or '.tmp' in name:
+            continue
+        path = os.path.join(bank_dir, name)
+        try:
+            with open(path[:-len('.npy')] + '.json') as f:
+                meta = json.load(f)
+            W = np.load(path, mmap_mode = 'r')
+            n, m = meta['dim']
+            if (W.shape != (meta['pool_size'], n * m)
+                or W.dtype.str != meta['dtype']
+                or _checksum(W) != meta['checksum']):
+                bad.append(path)
+        except (OSError, ValueError, KeyError):
+            bad.append(path)
+    return bad
+
+def evict_weight_bank(bank_dir, max_bytes, keep = ()):
+    '''
+    Remove the least recently used pools until the bank fits in max_bytes.
+    Pools are touched whenever a process opens them (see load_weight_bank).
+
+    Parameters
+    ----------
+    bank_dir : String
+        Directory of the weight bank.
+
+    max_bytes : int
+        Size cap of the bank in bytes.
+
+    keep : iterable of String
+        Paths of pools that are never evicted. Default set to ().
+
+    Returns
+    ----------
+    evicted : List of String
+        Paths of the removed pools
+    '''
+    keep = set(keep)
+    pools = []
+    for name in os.listdir(bank_dir):
+        if name.endswith('.npy') and '.tmp' not in name:
+            path = os.path.join(bank_dir, name)
+            stat = os.stat(path)
+            pools.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in pools)
+    evicted = []
+    for _, size, path in sorted(pools):
+        if total <= max_bytes:
+            break
+        if path in keep:
+            continue
+        os.remove(path)
+        try:
+            os.remove(path[:-len('.npy')] + '.json')
+        except OSError:
+            pass
+        _open_banks.pop(path, None)
+        total -= size
+        evicted.append(path)
+    return evicted
+
+
+def main():
+    command, params = parse_bank_args()
+    if command == 'build':
+        dim = tuple(params['dim'])
+        for cell_size in params['cell_size']:
+            for sparse_freq in params['sparse_freq']:
+                for seed in params['seed']:
+                    path = build_weight_bank(
+                        params['bank_dir'], dim, cell_size, sparse_freq, seed,
+                        pool_size = params['pool_size'],
+                        dtype = params['dtype'],
+                        max_bytes = params['max_bytes'])
+                    print(path)
+    elif command == 'verify':
+        bad = verify_weight_bank(params['bank_dir'])
+        for path in bad:
+            print(f"corrupt: {path}")
+        if bad:
+            sys.exit(1)
+        print("weight bank ok")
+
+if __name__ == '__main__':
+    main()
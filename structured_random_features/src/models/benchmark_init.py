@@ -0,0 +1,71 @@
+import argparse
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from src.models.networks import alexnet
+from src.models.init_weights import classical_init
+from src.models.weights import classical_covariance_matrix
+
+
+def legacy_classical_init(layer, scale=1):
+    """
+    Classical init of a Conv2d layer as it was done before the direct draw:
+    one multivariate_normal call on an explicit identity covariance per
+    input channel. Only used as the baseline of the benchmark.
+    """
+    out_channels, in_channels, xdim, ydim = layer.weight.shape
+    C = classical_covariance_matrix((xdim, ydim), scale)
+    data = layer.weight.data.numpy().copy()
+    for chan in range(in_channels):
+        W = np.random.multivariate_normal(np.zeros(xdim * ydim), cov=C, size=out_channels)
+        data[:, chan, :, :] = W.reshape(out_channels, xdim, ydim)
+    with torch.no_grad():
+        layer.weight.copy_(torch.from_numpy(data))
+
+
+def init_convs(model, init):
+    """
+    Apply init(layer, scale) to every Conv2d of the model with the fan_in
+    scaling used by alexnet.
+    """
+    for m in model.modules():
+        if isinstance(m, nn.Conv2d):
+            C_out, C_in, xdim, ydim = m.weight.shape
+            init(m, scale=1. / (C_in * xdim * ydim))
+
+
+def best_time(func, repeat):
+    """
+    Best wall time of repeat calls of func.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the initialization of AlexNet')
+    parser.add_argument('--repeat', default=3, type=int, metavar='N',
+                        help='number of timed runs, the best one is reported')
+    args = parser.parse_args()
+
+    model = alexnet(structured=False)
+    legacy = best_time(lambda: init_convs(model, legacy_classical_init), args.repeat)
+    direct = best_time(lambda: init_convs(model, lambda m, scale: classical_init(m, scale=scale, bias=True)),
+                       args.repeat)
+    classical = best_time(lambda: alexnet(structured=False), args.repeat)
+    structured = best_time(lambda: alexnet(structured=True), args.repeat)
+    print(f'classical conv init (multivariate_normal): {legacy:.3f} s')
+    print(f'classical conv init (direct draw):         {direct:.3f} s')
+    print(f'alexnet(structured=False):                 {classical:.3f} s')
+    print(f'alexnet(structured=True):                  {structured:.3f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -3,7 +3,7 @@ import torch
 import torch.nn as nn
 from torch import Tensor
 
-from src.models.weights import sensilla_weights, V1_weights, classical_weights
+from src.models.weights import sensilla_weights, V1_weights, classical_weights, check_rng
 
 def sensilla_init(layer, lowcut, highcut, decay_coef=np.inf, scale=1, bias=False, seed=None):
     """
@@ -97,10 +97,11 @@ def V1_init(layer, size, spatial_freq, center=None, scale=1., bias=False, seed=N
         layer.bias = None
 
 
-def classical_init(layer, scale=1, bias=False, seed=None):
+def classical_init(layer, scale=1, bias=False, seed=None, rng=None):
     """
     Inialize weights of a Linear layer or convolutional layer according to
     GP with diagonal covariance. The bias is turned off by default.
+    All the weights of the layer are drawn at once in float32.
     
     Parameters
     ----------
@@ -117,24 +118,27 @@ def classical_init(layer, scale=1, bias=False, seed=None):
     seed : int, default=None
         Used to set the seed when generating random weights.
 
+    rng : np.random.Generator, default=None
+        Generator to draw the weights from, see check_rng.
+
     """
     classname = layer.__class__.__name__
     assert classname.find('Linear') != -1 or classname.find('Conv2d') != -1, 'This init only works for Linear or Conv layers' 
+    rng = check_rng(rng, seed)
 
-    if classname.find('Linear') == 1: 
-        in_features, out_features = layer.weight.shape
-        classical_weight = classical_weights(out_features, in_features, scale, seed)
-        data = Tensor(classical_weight)
+    if classname.find('Linear') != -1: 
+        out_features, in_features = layer.weight.shape
+        classical_weight = classical_weights(out_features, in_features, scale, rng=rng, dtype=np.float32)
+        data = torch.from_numpy(classical_weight)
         with torch.no_grad():
             layer.weight.copy_(data)
         
-    elif classname.find('Conv2d') == 1:
+    elif classname.find('Conv2d') != -1:
+        # the same draw as one classical_weights call per input channel
         out_channels, in_channels, xdim, ydim = layer.weight.shape
-        data = layer.weight.data.numpy().copy()
-        for chan in range(in_channels):
-            W = classical_weights(out_channels, (xdim, ydim), scale, seed=seed)
-            data[:, chan, :, :] = W.reshape(out_channels, xdim, ydim)
-        data = Tensor(data)
+        W = classical_weights(in_channels * out_channels, (xdim, ydim), scale, rng=rng, dtype=np.float32)
+        W = W.reshape(in_channels, out_channels, xdim, ydim).transpose(1, 0, 2, 3)
+        data = torch.from_numpy(np.ascontiguousarray(W))
         with torch.no_grad():
             layer.weight.copy_(data)
         
@@ -1,6 +1,40 @@
 import numpy as np
 import numpy.linalg as la
-from scipy.spatial.distance import pdist, squareform
+import threading
+from collections import OrderedDict
+from numpy.lib.format import open_memmap
+
+
+def check_rng(rng=None, seed=None):
+    """
+    Returns the np.random.Generator to draw random weights from.
+
+    Passing a Generator lets every thread or process draw from its own 
+    stream (e.g. spawned from one np.random.SeedSequence), without touching
+    the global numpy random state.
+
+    Parameters
+    ----------
+
+    rng : np.random.Generator, default=None
+        Generator to draw from, returned as is.
+
+    seed : int or array-like of int, default=None
+        Seed of a new Generator when rng is None. With neither rng nor seed,
+        the new Generator is seeded from the global numpy random state, so
+        np.random.seed still makes the draw reproducible.
+
+    Returns
+    -------
+
+    rng : np.random.Generator
+        Generator to draw from
+    """
+    if rng is not None:
+        return rng
+    if seed is None:
+        seed = np.random.randint(2 ** 31)
+    return np.random.default_rng(seed)
 
 
 def sensilla_covariance_matrix(dim, sampling_rate, duration, lowcut, highcut, decay_coef=np.inf, scale=1):
@@ -43,19 +77,18 @@ def sensilla_covariance_matrix(dim, sampling_rate, duration, lowcut, highcut, de
     assert dim == int(sampling_rate * duration), "The dim of weights does not match sampling rate * duration"
 
     # time grid
-    grid = np.arange(0, duration, 1 / sampling_rate)
-    yy, xx = np.meshgrid(grid, grid)
-    diff = xx - yy
+    grid = np.arange(dim) / sampling_rate
 
-    # cosine part
+    # cosine part, Toeplitz in the lag between the two times
     low_idx = int(duration * lowcut)
     high_idx = int(duration * highcut)
-    C_cos = np.zeros((dim, dim))
-    for k in range(low_idx, high_idx):
-        C_cos += np.cos(2 * np.pi * k * diff / duration)
+    k = np.arange(low_idx, high_idx).reshape(-1, 1)
+    lag = np.cos(2 * np.pi * k * grid / duration).sum(axis=0)
+    C_cos = lag[np.abs(np.subtract.outer(np.arange(dim), np.arange(dim)))]
 
-    # exponential part
-    C_exp = np.exp(((xx - duration) + (yy - duration)) / decay_coef)
+    # exponential part, separable in the two times
+    envelope = np.exp((grid - duration) / decay_coef)
+    C_exp = np.outer(envelope, envelope)
 
     # final covariance matrix
     C = C_cos * C_exp 
@@ -63,7 +96,8 @@ def sensilla_covariance_matrix(dim, sampling_rate, duration, lowcut, highcut, de
     C += 1e-5 * np.eye(dim)
     return C
 
-def sensilla_weights(num_weights, dim, sampling_rate, duration, lowcut, highcut, decay_coef=np.inf, scale=1, seed=None):
+def sensilla_weights(num_weights, dim, sampling_rate, duration, lowcut, highcut, decay_coef=np.inf, scale=1, seed=None, rng=None,
+                     var_frac=None, rank=None, return_captured=False, fft=True):
     """
     Generates random weights with tuning similar to mechanosensory 
     neurons found in insect halteres and wings.
@@ -92,21 +126,124 @@ def sensilla_weights(num_weights, dim, sampling_rate, duration, lowcut, highcut,
     
     seed : int, default=None
         Used to set the seed when generating random weights.
+
+    rng : np.random.Generator, default=None
+        Generator to draw the weights from, see check_rng.
+
+    var_frac : float, default=None
+        Draw from the top eigencomponents of the covariance that capture
+        this fraction of its trace, see low_rank_factor.
+        With default value, the weights are drawn from the full covariance.
+
+    rank : int, default=None
+        Draw from the top rank eigencomponents instead of var_frac.
+
+    return_captured : bool, default=False
+        Also return the fraction of the trace of the covariance captured
+        by the weights, 1 without var_frac and rank.
+
+    fft : bool, default=True
+        Draw the weights with sensilla_weights_fft, without forming the 
+        covariance matrix. Otherwise draw them from the covariance matrix.
     
     Returns
     -------
 
     W : array-like of shape (num_weights, dim)
         Matrix of Random weights.
+
+    captured : float
+        Captured fraction of the trace, only with return_captured
     """
     assert dim == int(sampling_rate * duration), "The dim of weights does not match sampling rate * duration"
-    np.random.seed(seed)
+    rng = check_rng(rng, seed)
+    if var_frac is None and rank is None and fft:
+        W = sensilla_weights_fft(num_weights, dim, sampling_rate, duration, lowcut, highcut, decay_coef, scale, rng=rng)
+        return (W, 1.0) if return_captured else W
     C = sensilla_covariance_matrix(dim, sampling_rate, duration, lowcut, highcut, decay_coef, scale)
-    W = np.random.multivariate_normal(np.zeros(dim), cov=C, size=num_weights)
+    if var_frac is None and rank is None:
+        W = rng.multivariate_normal(np.zeros(dim), cov=C, size=num_weights)
+        captured = 1.0
+    else:
+        B, captured = low_rank_factor(C, var_frac, rank)
+        W = rng.standard_normal((num_weights, B.shape[1])) @ B.T
+    if return_captured:
+        return W, captured
+    return W
+
+def sensilla_weights_fft(num_weights, dim, sampling_rate, duration, lowcut, highcut, decay_coef=np.inf, scale=1, seed=None, rng=None,
+                         chunk_size=None):
+    """
+    Draws the same random weights as sensilla_weights without forming the
+    covariance matrix.
+
+    The cosine part of the covariance is a sum of cosines over the frequency
+    band, so a stationary sample is sum_k a_k cos(2 pi k t / duration) + 
+    b_k sin(2 pi k t / duration) with a_k, b_k ~ N(0, 1). When dim equals 
+    sampling_rate * duration the covariance is circulant and the sum is one
+    inverse FFT of the (a_k - i b_k) spectrum, O(dim log dim) per weight. 
+    Otherwise it is a (2 * num_freq) x dim product with the sines and 
+    cosines. The stationary samples are then multiplied by the decay 
+    envelope, normalized to Tr norm = scale * dim, and the 1e-5 jitter is
+    added as independent noise.
+
+    Parameters
+    ----------
+
+    num_weights, dim, sampling_rate, duration, lowcut, highcut, decay_coef,
+    scale, seed, rng
+        See sensilla_weights.
+
+    chunk_size : int, default=None
+        Number of weights transformed at once.
+        With default value, chunks of about 4M spectrum entries.
+
+    Returns
+    -------
+
+    W : array-like of shape (num_weights, dim)
+        Matrix of Random weights.
+    """
+    assert dim == int(sampling_rate * duration), "The dim of weights does not match sampling rate * duration"
+    rng = check_rng(rng, seed)
+    grid = np.arange(dim) / sampling_rate
+    k = np.arange(int(duration * lowcut), int(duration * highcut))
+    envelope = np.exp((grid - duration) / decay_coef)
+
+    # the diagonal of the cosine part is len(k), so Tr = len(k) * |envelope|^2
+    envelope *= np.sqrt(scale * dim / (len(k) * np.sum(envelope ** 2)))
+
+    periodic = np.isclose(sampling_rate * duration, dim)
+    if not periodic:
+        phase = 2 * np.pi * np.outer(k, grid) / duration
+        trig = np.vstack((np.cos(phase), np.sin(phase)))
+    bins = k % dim
+    unique = len(np.unique(bins)) == len(bins)
+    if chunk_size is None:
+        chunk_size = max(1, 2 ** 22 // dim)
+
+    W = np.empty((num_weights, dim))
+    for start in range(0, num_weights, chunk_size):
+        num = min(chunk_size, num_weights - start)
+        coef = rng.standard_normal((num, 2 * len(k)))
+        if periodic:
+            spectrum = np.zeros((num, dim), dtype=complex)
+            coef = coef[:, :len(k)] - 1j * coef[:, len(k):]
+            if unique:
+                spectrum[:, bins] = coef
+            else:
+                np.add.at(spectrum, (slice(None), bins), coef)
+            W_chunk = np.fft.ifft(spectrum, axis=1).real * dim
+        else:
+            W_chunk = coef @ trig
+        W_chunk *= envelope
+        W_chunk += np.sqrt(1e-5) * rng.standard_normal((num, dim))
+        W[start:start + num] = W_chunk
     return W
 
 
-def V1_covariance_matrix(dim, size, spatial_freq, center, scale=1):
+def V1_covariance_matrix(dim, size, spatial_freq, center, scale=1,
+                         block_size=None, out=None):
     """
     Generates the covariance matrix for Gaussian Process with non-stationary 
     covariance. This matrix will be used to generate random 
@@ -132,6 +269,16 @@ def V1_covariance_matrix(dim, size, spatial_freq, center, scale=1):
     scale: float, default=1
         Normalization factor for Tr norm of cov matrix
 
+    block_size : int, default=None
+        Number of rows of C computed at once. The temporaries of each block
+        are (block_size, dim[0] * dim[1]), so the output is the only full
+        size array. Defaults to blocks of about 4M entries.
+
+    out : array-like or str, default=None
+        Preallocated (dim[0] * dim[1], dim[0] * dim[1]) array, e.g. a memmap,
+        to write C into. A str is the path of an .npy memmap created for it.
+        Defaults to a new float64 array.
+
     Returns
     -------
 
@@ -139,18 +286,380 @@ def V1_covariance_matrix(dim, size, spatial_freq, center, scale=1):
         covariance matrix w/ Tr norm = scale * dim[0] * dim[1]
     """
 
-    x = np.arange(dim[0])
-    y = np.arange(dim[1])
-    yy, xx = np.meshgrid(y, x)
-    grid = np.column_stack((xx.flatten(), yy.flatten()))
-
-    a = squareform(pdist(grid, 'sqeuclidean'))
-    b = la.norm(grid - center, axis=1) ** 2
-    c = b.reshape(-1, 1)
-    C = np.exp(-a / (2 * spatial_freq ** 2)) * np.exp(-b / (2 * size ** 2)) * np.exp(-c / (2 * size ** 2)) \
-        + 1e-5 * np.eye(dim[0] * dim[1])
-    C *= scale * dim[0] * dim[1] / np.trace(C)
-    return C
+    N = dim[0] * dim[1]
+    xx, yy = np.divmod(np.arange(N), dim[1])
+    xx, yy = xx.astype(float), yy.astype(float)
+    g = np.exp(-((xx - center[0]) ** 2 + (yy - center[1]) ** 2)
+               / (2 * size ** 2))
+    # the diagonal is g ** 2 + 1e-5, so the trace is known before building C
+    norm = scale * N / (np.sum(g ** 2) + 1e-5 * N)
+
+    if out is None:
+        out = np.empty((N, N))
+    elif isinstance(out, str):
+        out = open_memmap(out, mode='w+', dtype=np.float64, shape=(N, N))
+    elif out.shape != (N, N):
+        raise Exception(f"out has shape {out.shape}, expected {(N, N)}")
+    if block_size is None:
+        block_size = max(1, 2 ** 22 // N)
+
+    for start in range(0, N, block_size):
+        stop = min(start + block_size, N)
+        block = np.subtract.outer(xx[start:stop], xx)
+        block **= 2
+        block += np.subtract.outer(yy[start:stop], yy) ** 2
+        block *= -1 / (2 * spatial_freq ** 2)
+        np.exp(block, out=block)
+        block *= (norm * g[start:stop]).reshape(-1, 1)
+        block *= g
+        idx = np.arange(stop - start)
+        block[idx, idx + start] += 1e-5 * norm
+        out[start:stop] = block
+    if isinstance(out, np.memmap):
+        out.flush()
+    return out
+
+
+def V1_covariance_factors(dim, size, spatial_freq, center, scale=1):
+    """
+    Generates the row and column factors of the V1 covariance matrix.
+
+    The V1 covariance is a product of Gaussians in the squared distance, so it
+    splits over the two axes of the grid, C = kron(C_row, C_col). Only the 
+    (dim[0] x dim[0]) and (dim[1] x dim[1]) factors are built. The 1e-5 
+    jitter is added to each factor, so kron(C_row, C_col) matches 
+    V1_covariance_matrix up to a jitter of the same order.
+
+    Parameters
+    ----------
+
+    dim : tuple of shape (2, 1)
+        Dimension of random features.
+
+    size : float
+        Determines the size of the random weights 
+
+    spatial_freq : float
+        Determines the spatial frequency of the random weights  
+    
+    center : tuple of shape (2, 1)
+        Location of the center of the random weights.
+
+    scale: float, default=1
+        Normalization factor for Tr norm of cov matrix
+
+    Returns
+    -------
+
+    C_row : array-like of shape (dim[0], dim[0])
+        covariance matrix of the rows w/ Tr norm = scale * dim[0]
+
+    C_col : array-like of shape (dim[1], dim[1])
+        covariance matrix of the columns w/ Tr norm = dim[1]
+    """
+
+    factors = []
+    for d, c in zip(dim, center):
+        x = np.arange(d)
+        a = (x.reshape(-1, 1) - x) ** 2
+        b = (x - c) ** 2
+        C = np.exp(-a / (2 * spatial_freq ** 2)) * np.exp(-b / (2 * size ** 2)) \
+            * np.exp(-b.reshape(-1, 1) / (2 * size ** 2)) + 1e-5 * np.eye(d)
+        C *= d / np.trace(C)
+        factors.append(C)
+    factors[0] *= scale
+    return tuple(factors)
+
+
+def covariance_factor(C):
+    """
+    Computes a factor L of the covariance matrix such that C = L @ L.T.
+    Uses the Cholesky factor, and falls back to the eigen decomposition
+    (clipping the negative eigenvalues) when C is not numerically 
+    positive definite.
+
+    Parameters
+    ----------
+
+    C : array-like of shape (dim, dim)
+        Covariance matrix
+
+    Returns
+    -------
+
+    L : array-like of shape (dim, dim)
+        Factor of the covariance matrix
+    """
+    try:
+        L = la.cholesky(C)
+    except la.LinAlgError:
+        eigval, eigvec = la.eigh(C)
+        L = eigvec * np.sqrt(np.clip(eigval, 0, None))
+    return L
+
+
+def _top_eigen(eigval, var_frac=None, rank=None):
+    """
+    Selects the largest eigenvalues that capture var_frac of their sum, or
+    the rank largest ones. Returns their indices, largest first, and the
+    captured fraction.
+    """
+    eigval = np.clip(eigval, 0, None)
+    order = np.argsort(eigval)[::-1]
+    frac = np.cumsum(eigval[order]) / np.sum(eigval)
+    if rank is None:
+        if var_frac is None or not 0 < var_frac <= 1:
+            raise Exception(f"var_frac must be in (0, 1], got {var_frac}")
+        rank = int(np.searchsorted(frac, var_frac)) + 1
+    rank = min(max(int(rank), 1), len(eigval))
+    return order[:rank], frac[rank - 1]
+
+
+def low_rank_factor(C, var_frac=None, rank=None):
+    """
+    Computes a low-rank factor B of the covariance matrix such that 
+    C ~ B @ B.T, keeping the top eigencomponents of C. Weights drawn as
+    z @ B.T with z ~ N(0, I_r) cost O(r * dim) instead of O(dim^2).
+
+    Parameters
+    ----------
+
+    C : array-like of shape (dim, dim)
+        Covariance matrix
+
+    var_frac : float, default=None
+        Keep the fewest components whose eigenvalues add up to this 
+        fraction of the trace of C.
+
+    rank : int, default=None
+        Keep the top rank components instead of var_frac.
+
+    Returns
+    -------
+
+    B : array-like of shape (dim, r)
+        Low-rank factor of the covariance matrix
+
+    captured : float
+        Fraction of the trace of C captured by B @ B.T
+    """
+    eigval, eigvec = la.eigh(C)
+    idx, captured = _top_eigen(eigval, var_frac, rank)
+    B = eigvec[:, idx] * np.sqrt(np.clip(eigval[idx], 0, None))
+    return B, captured
+
+
+def low_rank_kron_factor(C_row, C_col, var_frac=None, rank=None):
+    """
+    Low-rank factor of C = kron(C_row, C_col) (see low_rank_factor), built 
+    from the eigen decompositions of the two factors. The eigenpairs of C
+    are the products of the eigenpairs of C_row and C_col, so only the r
+    selected columns of size dim[0] * dim[1] are ever formed.
+
+    Parameters
+    ----------
+
+    C_row : array-like of shape (dim[0], dim[0])
+        Covariance matrix of the rows
+
+    C_col : array-like of shape (dim[1], dim[1])
+        Covariance matrix of the columns
+
+    var_frac, rank
+        See low_rank_factor.
+
+    Returns
+    -------
+
+    B : array-like of shape (dim[0] * dim[1], r)
+        Low-rank factor of the covariance matrix
+
+    captured : float
+        Fraction of the trace of C captured by B @ B.T
+    """
+    val_row, vec_row = la.eigh(C_row)
+    val_col, vec_col = la.eigh(C_col)
+    eigval = np.outer(val_row, val_col).ravel()
+    idx, captured = _top_eigen(eigval, var_frac, rank)
+    i, j = np.divmod(idx, len(val_col))
+    B = vec_row[:, None, i] * vec_col[None, :, j]
+    B = B.reshape(-1, len(idx)) * np.sqrt(np.clip(eigval[idx], 0, None))
+    return B, captured
+
+
+class V1Sampler:
+    """
+    Draws V1 weights from cached factors of the V1 covariance matrix.
+
+    The covariance only depends on (dim, size, spatial_freq, center, scale),
+    so its factor is computed once per parameter set and every draw is a
+    single matmul of the factor against standard normals. The total size of
+    the cached factors is bounded, the least recently used ones are dropped
+    first. A factor larger than the bound is returned but not cached.
+
+    With kron=True the sampler uses the Kronecker factors of the covariance
+    (see V1_covariance_factors) instead of the full matrix. Factoring costs
+    O(dim[0]^3 + dim[1]^3) and a draw O(num_weights * dim[0] * dim[1] * 
+    (dim[0] + dim[1])), instead of O((dim[0] * dim[1])^3) to factor the full
+    covariance.
+
+    With var_frac or rank the sampler keeps only the top r eigencomponents
+    of the covariance (see low_rank_factor and low_rank_kron_factor), and a
+    draw costs O(num_weights * r * dim[0] * dim[1]).
+
+    Parameters
+    ----------
+
+    max_bytes : int, default=2**28
+        Maximum total size in bytes of the cached covariance factors (256 MiB,
+        the full factor of a 64 x 64 covariance is 128 MiB in float64)
+    """
+
+    def __init__(self, max_bytes=2**28):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._factors = OrderedDict()
+        self._lock = threading.Lock()
+
+    def factor(self, dim, size, spatial_freq, center, scale=1, kron=False):
+        """
+        Returns the (cached) factor L of the V1 covariance matrix, 
+        C = L @ L.T. See V1_covariance_matrix for the parameters.
+
+        Returns
+        -------
+
+        L : read-only array-like of shape (dim[0] * dim[1], dim[0] * dim[1])
+            Factor of the covariance matrix. With kron=True, the tuple 
+            (L_row, L_col) of the factors of C_row and C_col instead.
+        """
+        key = self._key(dim, size, spatial_freq, center, scale, kron)
+        L = self._get(key)
+        if L is not None:
+            return L
+
+        if kron:
+            Cs = V1_covariance_factors(dim, size, spatial_freq, center, scale)
+        else:
+            Cs = [V1_covariance_matrix(dim, size, spatial_freq, center, scale)]
+        L = tuple(covariance_factor(C) for C in Cs)
+        for L_i in L:
+            L_i.setflags(write=False)
+        L = L if kron else L[0]
+        self._put(key, L)
+        return L
+
+    def low_rank(self, dim, size, spatial_freq, center, scale=1, kron=False,
+                 var_frac=None, rank=None):
+        """
+        Returns the (cached) low-rank factor B of the V1 covariance matrix,
+        C ~ B @ B.T, and the fraction of the trace of C it captures. See 
+        low_rank_factor for var_frac and rank.
+
+        Returns
+        -------
+
+        B : read-only array-like of shape (dim[0] * dim[1], r)
+            Low-rank factor of the covariance matrix
+
+        captured : float
+            Fraction of the trace of C captured by B @ B.T
+        """
+        key = self._key(dim, size, spatial_freq, center, scale, kron,
+                        var_frac, rank)
+        factor = self._get(key)
+        if factor is not None:
+            return factor
+
+        if kron:
+            Cs = V1_covariance_factors(dim, size, spatial_freq, center, scale)
+            B, captured = low_rank_kron_factor(*Cs, var_frac, rank)
+        else:
+            C = V1_covariance_matrix(dim, size, spatial_freq, center, scale)
+            B, captured = low_rank_factor(C, var_frac, rank)
+        B.setflags(write=False)
+        self._put(key, (B, captured))
+        return B, captured
+
+    def _key(self, dim, size, spatial_freq, center, scale, kron,
+             var_frac=None, rank=None):
+        # rank takes precedence over var_frac, see _top_eigen
+        if rank is not None:
+            rank, var_frac = int(rank), None
+        elif var_frac is not None:
+            var_frac = float(var_frac)
+        return (tuple(int(d) for d in dim), float(size), float(spatial_freq),
+                tuple(float(c) for c in center), float(scale), bool(kron),
+                var_frac, rank)
+
+    def _get(self, key):
+        with self._lock:
+            if key in self._factors:
+                self._factors.move_to_end(key)
+                return self._factors[key]
+
+    @staticmethod
+    def _nbytes(factor):
+        # a factor, the kron tuple of factors or the low-rank (B, captured)
+        if isinstance(factor, np.ndarray):
+            return factor.nbytes
+        return sum(f.nbytes for f in factor if isinstance(f, np.ndarray))
+
+    def _put(self, key, factor):
+        nbytes = self._nbytes(factor)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._factors:
+                return
+            self._factors[key] = factor
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._factors.popitem(last=False)
+                self.nbytes -= self._nbytes(evicted)
+
+    def sample(self, num_weights, dim, size, spatial_freq, center, scale=1,
+               kron=False, rng=None, var_frac=None, rank=None):
+        """
+        Draws num_weights V1 weights with the given center from rng 
+        (see check_rng). With var_frac or rank, the weights are drawn from
+        the low-rank factor of the covariance.
+
+        Returns
+        -------
+
+        W : array-like of shape (num_weights, dim[0] * dim[1])
+            Matrix of random weights
+        """
+        rng = check_rng(rng)
+        if var_frac is not None or rank is not None:
+            B, _ = self.low_rank(dim, size, spatial_freq, center, scale, kron,
+                                 var_frac, rank)
+            return rng.standard_normal((num_weights, B.shape[1])) @ B.T
+        L = self.factor(dim, size, spatial_freq, center, scale, kron)
+        if kron:
+            # (L_row kron L_col) z is L_row @ Z @ L_col.T with z = vec(Z)
+            L_row, L_col = L
+            Z = rng.standard_normal((num_weights, dim[0], dim[1]))
+            W = L_row @ Z @ L_col.T
+            return W.reshape(num_weights, dim[0] * dim[1])
+        Z = rng.standard_normal((num_weights, L.shape[0]))
+        return Z @ L.T
+
+    def clear(self):
+        """
+        Drops every cached factor.
+        """
+        with self._lock:
+            self._factors.clear()
+            self.nbytes = 0
+
+
+# shared sampler used by V1_weights
+V1_sampler = V1Sampler()
+
+# V1_weights switches to the Kronecker sampler above this many pixels
+V1_KRON_MIN_DIM = 64 * 64
 
 
 def classical_covariance_matrix(dim, scale=1):
@@ -221,13 +730,56 @@ def shift_pad(img, y_shift, x_shift):
     if x_shift < 0:
         img_shifted[:, x_shift:] = 0
     return img_shifted
+
+
+def shift_pad_batch(imgs, shifts):
+    '''
+    Batched shift_pad. Shifts every image by its own (y_shift, x_shift) and 
+    zero pads the portion that ends up outside the original frame, gathering
+    all images at once with precomputed row and column index maps instead of
+    looping over shift_pad.
     
+    Parameters
+    ----------
+    imgs: array-like of shape (num_imgs, n, m)
+        images to shift
+        
+    shifts: array-like of shape (num_imgs, 2)
+        Pixel shift (y_shift, x_shift) of each image
+    
+    Returns
+    -------
+    imgs_shifted: array-like with the same shape as imgs
+        Shifted and zero padded images
 
-def V1_weights(num_weights, dim, size, spatial_freq, center=None, scale=1, seed=None):
+    '''
+    num_imgs, n, m = imgs.shape
+    shifts = np.asarray(shifts)
+    # source row / column of every output pixel, -1 when out of the frame
+    rows = np.arange(n) - shifts[:, :1]
+    cols = np.arange(m) - shifts[:, 1:]
+    row_valid = (rows >= 0) & (rows < n)
+    col_valid = (cols >= 0) & (cols < m)
+    rows = np.where(row_valid, rows, 0)
+    cols = np.where(col_valid, cols, 0)
+
+    idx = np.arange(num_imgs)[:, None, None]
+    imgs_shifted = imgs[idx, rows[:, :, None], cols[:, None, :]]
+    imgs_shifted *= row_valid[:, :, None] & col_valid[:, None, :]
+    return imgs_shifted
+    
+
+def V1_weights(num_weights, dim, size, spatial_freq, center=None, scale=1, seed=None, kron=None, rng=None,
+               var_frac=None, rank=None, return_captured=False):
     """
     Generate random weights inspired by the tuning properties of the 
     neurons in Primary Visual Cortex (V1).
 
+    The covariance factor is cached by V1_sampler, so repeated calls with
+    the same parameters only draw standard normals and do one matmul.
+    Large grids use the Kronecker factors of the covariance, which never
+    form the (dim[0] * dim[1])^2 covariance matrix.
+
     If a value is given for the center, all generated weights have the same center
     If value is set to None, the centers randomly cover the RF space
 
@@ -256,40 +808,72 @@ def V1_weights(num_weights, dim, size, spatial_freq, center=None, scale=1, seed=
     seed : int, default=None
         Used to set the seed when generating random weights.
 
+    kron : bool, default=None
+        Sample from the Kronecker factors of the covariance.
+        With default value, used when dim[0] * dim[1] > V1_KRON_MIN_DIM
+
+    rng : np.random.Generator, default=None
+        Generator to draw the weights and centers from, see check_rng.
+
+    var_frac : float, default=None
+        Draw from the top eigencomponents of the covariance that capture
+        this fraction of its trace, see V1Sampler.low_rank.
+        With default value, the weights are drawn from the full covariance.
+
+    rank : int, default=None
+        Draw from the top rank eigencomponents instead of var_frac.
+
+    return_captured : bool, default=False
+        Also return the fraction of the trace of the covariance captured
+        by the weights, 1 without var_frac and rank.
+
     Returns
     -------
 
     W : array-like of shape (num_weights, dim[0] * dim[1])
         Matrix of random weights
 
+    captured : float
+        Captured fraction of the trace, only with return_captured
+
     """
-    np.random.seed(seed)
+    rng = check_rng(rng, seed)
+    if kron is None:
+        kron = dim[0] * dim[1] > V1_KRON_MIN_DIM
     if center == None: # centers uniformly cover the visual field
         # first generate centered weights
         c = (int(dim[0]/ 2), int(dim[1]/2)) # center of the visual field
-        C = V1_covariance_matrix(dim, size, spatial_freq, c, scale) 
-        W_centered = np.random.multivariate_normal(mean=np.zeros(dim[0] * dim[1]), cov=C, size=num_weights)
+        W_centered = V1_sampler.sample(num_weights, dim, size, spatial_freq, c, scale, kron, rng,
+                                       var_frac, rank)
         W_centered = W_centered.reshape(-1, dim[0], dim[1])
         
         # shift around to uniformly cover the visual field
-        centers = np.random.randint((dim[0], dim[1]), size=(num_weights, 2))
+        centers = rng.integers((dim[0], dim[1]), size=(num_weights, 2))
         shifts = centers - c
-        W = np.zeros_like(W_centered)
-        for i, [y_shift, x_shift] in enumerate(shifts):
-            W[i] = shift_pad(W_centered[i], y_shift, x_shift)
+        W = shift_pad_batch(W_centered, shifts)
         W = W.reshape(-1, dim[0] * dim[1])
 
     elif center is not None:
-        C = V1_covariance_matrix(dim, size, spatial_freq, center, scale)
-        W = np.random.multivariate_normal(mean=np.zeros(dim[0] * dim[1]), cov=C, size=num_weights)
-        
+        c = center
+        W = V1_sampler.sample(num_weights, dim, size, spatial_freq, center, scale, kron, rng,
+                              var_frac, rank)
+
+    if return_captured:
+        captured = 1.0
+        if var_frac is not None or rank is not None:
+            _, captured = V1_sampler.low_rank(dim, size, spatial_freq, c, scale, kron, var_frac, rank)
+        return W, captured
     return W
 
 
-def classical_weights(num_weights, dim, scale=1, seed=None):
+def classical_weights(num_weights, dim, scale=1, seed=None, rng=None, dtype=np.float64):
     """"
     Generates classical random weights with identity covariance W ~ N(0, I).
 
+    The covariance is scale * I, so the weights are drawn directly as 
+    standard normals times sqrt(scale) instead of going through 
+    classical_covariance_matrix and multivariate_normal.
+
     Parameters
     ----------
 
@@ -305,21 +889,27 @@ def classical_weights(num_weights, dim, scale=1, seed=None):
     seed : int, default=None
         Used to set the seed when generating random weights.
 
+    rng : np.random.Generator, default=None
+        Generator to draw the weights from, see check_rng.
+
+    dtype : data-type, default=np.float64
+        np.float64 or np.float32, type of the weights.
+
     Returns
     -------
 
     W : array-like of shape (num_weights, dim) or (num_weights, dim[0] * dim[1])
         Matrix of random weights.
     """
-    C = classical_covariance_matrix(dim, scale)
+    rng = check_rng(rng, seed)
     if type(dim) is tuple:
-        W = np.random.multivariate_normal(mean=np.zeros(dim[0] * dim[1]), cov=C, size=num_weights)
-    elif type(dim) is int:
-        W = np.random.multivariate_normal(mean=np.zeros(dim), cov=C, size=num_weights)
+        dim = dim[0] * dim[1]
+    W = rng.standard_normal((num_weights, dim), dtype=dtype)
+    W *= np.sqrt(scale)
     return W
 
 
-def V1_weights_for_plotting(num_weights, dim, size, spatial_freq, center, scale=1, random_state=None):
+def V1_weights_for_plotting(num_weights, dim, size, spatial_freq, center, scale=1, random_state=None, rng=None):
     """
     Generates random weights for one given center by sampling a 
     non-stationary Gaussian Process. 
@@ -349,18 +939,21 @@ def V1_weights_for_plotting(num_weights, dim, size, spatial_freq, center, scale=
     scale: float, default=1
         Normalization factor for Tr norm of cov matrix
 
-    seed : int, default=None
+    random_state : int, default=None
         Used to set the seed when generating random weights.
 
+    rng : np.random.Generator, default=None
+        Generator to draw the weights from, see check_rng.
+
     Returns
     -------
 
     W : (array-like) of shape (num_weights, dim)
         Random weights
     """
-    np.random.seed(random_state) 
+    rng = check_rng(rng, random_state)
     K = V1_covariance_matrix(dim, size, spatial_freq, center, scale=1)
     L = la.cholesky(K)
-    W = np.dot(L, np.random.randn(dim[0] * dim[1], num_weights)).T
+    W = np.dot(L, rng.standard_normal((dim[0] * dim[1], num_weights))).T
     return W
 